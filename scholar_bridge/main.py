@@ -1,14 +1,11 @@
 import asyncio
 import argparse
 import os
-from termcolor import colored
-from dotenv import load_dotenv
-import asyncio
-import argparse
-import os
+import aiofiles
 from termcolor import colored
 from dotenv import load_dotenv
 from scholar_bridge.src.agents.graph import app  # Import the compiled graph
+from scholar_bridge.src.config_loader import DATA_DIR
 
 # Load env vars
 load_dotenv()
@@ -27,22 +24,32 @@ async def main():
     
     # Run the Graph
     # Note: LangGraph execute is usually sync or async depending on configuration.
-    # Since our nodes are async, we use ainvoke
+    # Since our nodes are async, we use astream:
+    # "custom" carries the blog text as it is written, "values" the full state
     inputs = {"url": args.url}
-    result = await app.ainvoke(inputs)
+    result = {}
+    streaming = False
+    async for mode, chunk in app.astream(inputs, stream_mode=["custom", "values"]):
+        if mode == "values":
+            result = chunk
+        elif "blog_chunk" in chunk:
+            if not streaming:
+                print("\n\n" + "="*50)
+                print(colored("✨ FINAL BLOG POST ✨", "green"))
+                print("="*50 + "\n")
+                streaming = True
+            print(chunk["blog_chunk"], end="", flush=True)
     
     print("\n\n" + "="*50)
     
     if result.get("final_blog"):
-        print(colored("✨ FINAL BLOG POST ✨", "green"))
-        print("="*50 + "\n")
-        print(result["final_blog"])
-        
         # Save to output
-        os.makedirs("scholar_bridge/data/outputs", exist_ok=True)
-        with open("scholar_bridge/data/outputs/latest_blog.md", "w") as f:
-            f.write(str(result["final_blog"]))
-        print(colored(f"\nSaved to scholar_bridge/data/outputs/latest_blog.md", "blue"))
+        output_dir = os.path.join(DATA_DIR, "outputs")
+        os.makedirs(output_dir, exist_ok=True)
+        output_path = os.path.join(output_dir, "latest_blog.md")
+        async with aiofiles.open(output_path, "w") as f:
+            await f.write(result["final_blog"])
+        print(colored(f"\nSaved to {output_path}", "blue"))
     else:
         print(colored("❌ Workflow ended without producing a blog post (likely no relevant papers found).", "red"))
 
@@ -1,4 +1,5 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from src.agents.graph import app as graph_app
 import uvicorn
@@ -48,5 +49,30 @@ async def run_workflow(request: Request):
     # Filter out non-serializable objects if any, though our state is pure JSON-compatible
     return result
 
+@app.post("/run/stream")
+async def run_workflow_stream(request: Request):
+    """Same as /run, but streams the blog post as plain text while it is written."""
+    try:
+        data = await request.json()
+    except Exception as e:
+        print(f"ERROR Parsing JSON: {e}")
+        return {"error": "Invalid JSON body", "details": str(e)}
+        
+    data = data or {} # Handle None
+    url = data.get("url")
+    mode = data.get("mode", "deep") # fast or deep
+    
+    if not url:
+        return {"error": "URL is required"}
+    
+    print(f"Server received streaming request for: {url} [Mode: {mode}]")
+    
+    async def blog_chunks():
+        async for chunk in graph_app.astream({"url": url, "mode": mode}, stream_mode="custom"):
+            if "blog_chunk" in chunk:
+                yield chunk["blog_chunk"]
+    
+    return StreamingResponse(blog_chunks(), media_type="text/plain")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,11 +1,16 @@
 import arxiv
-import yaml
+from ..config_loader import load
 from datetime import datetime, timedelta, timezone
 
 class ArxivSearchAgent:
     def __init__(self, config_path: str = "scholar_bridge/config/model_config.yaml"):
-        with open(config_path, "r") as f:
-            self.config = yaml.safe_load(f)["arxiv_settings"]
+        self.config = load(config_path)["arxiv_settings"]
+        
+        # Resolve sort enums once, e.g. "submittedDate" -> SortCriterion.SubmittedDate
+        sort_by = self.config["sort_by"]
+        sort_order = self.config["sort_order"]
+        self.sort_by = getattr(arxiv.SortCriterion, sort_by[0].upper() + sort_by[1:])
+        self.sort_order = getattr(arxiv.SortOrder, sort_order[0].upper() + sort_order[1:].lower())
 
     def search_papers(self, query: str) -> list:
         """
@@ -17,22 +22,24 @@ class ArxivSearchAgent:
         # Construct client
         client = arxiv.Client()
         
-        # Build search
+        # Build search, letting ArXiv apply the date window server-side
+        now = datetime.now(timezone.utc)
+        cutoff_date = now - timedelta(days=self.config["search_period_days"])
+        dated_query = (
+            f"({query}) AND submittedDate:"
+            f"[{cutoff_date.strftime('%Y%m%d%H%M')} TO {now.strftime('%Y%m%d%H%M')}]"
+        )
         search = arxiv.Search(
-            query = query,
-            max_results = self.config["max_results"] * 2, # Fetch extra to allow for date filtering
-            sort_by = getattr(arxiv.SortCriterion, self.config["sort_by"][0].upper() + self.config["sort_by"][1:]),
-            sort_order = getattr(arxiv.SortOrder, self.config["sort_order"].upper()[0] + self.config["sort_order"].lower()[1:])
+            query = dated_query,
+            max_results = self.config["max_results"],
+            sort_by = self.sort_by,
+            sort_order = self.sort_order
         )
 
         results = []
-        cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.config["search_period_days"])
         
         try:
             for r in client.results(search):
-                if r.published < cutoff_date:
-                    continue
-                    
                 paper_data = {
                     "title": r.title,
                     "abstract": r.summary.replace("\n", " "),
@@ -1,5 +1,8 @@
+import asyncio
+import functools
 from typing import TypedDict, List, Optional
 from langgraph.graph import StateGraph, END
+from langgraph.config import get_stream_writer
 
 # Import our existing agents
 from .website_analysis import WebsiteAnalysisAgent
@@ -23,9 +26,16 @@ class ScholarState(TypedDict):
 
 from .react_researcher import ReactResearcherAgent
 
+# Agents are stateless, so each one is built once and shared across runs.
+# Construction is deferred to first use because GeminiClient needs the API key,
+# which the entry points only load after importing this module.
+@functools.lru_cache(maxsize=None)
+def _agent(cls, *args):
+    return cls(*args)
+
 # 2. Define Nodes
 async def analyze_website(state: ScholarState):
-    agent = WebsiteAnalysisAgent()
+    agent = _agent(WebsiteAnalysisAgent)
     print(f"\n[Graph] Analyzing: {state['url']}")
     result = await agent.analyze(state['url'])
     
@@ -37,14 +47,15 @@ async def analyze_website(state: ScholarState):
         "brand_voice": result.get("brand_voice", "Professional")
     }
 
-def search_arxiv(state: ScholarState):
-    agent = ArxivSearchAgent()
+async def search_arxiv(state: ScholarState):
+    agent = _agent(ArxivSearchAgent)
     print(f"\n[Graph] Searching ArXiv for: {state['niche']}")
-    papers = agent.search_papers(state["niche"])
+    # Blocking HTTP call; run it in a worker thread so the event loop stays free
+    papers = await asyncio.to_thread(agent.search_papers, state["niche"])
     return {"raw_papers": papers}
 
 async def filter_papers(state: ScholarState):
-    agent = PaperFilterAgent()
+    agent = _agent(PaperFilterAgent)
     print(f"\n[Graph] Filtering {len(state['raw_papers'])} papers...")
     valid_papers = await agent.filter_papers(state["raw_papers"], state["niche"])
     
@@ -52,43 +63,67 @@ async def filter_papers(state: ScholarState):
     return {"best_paper": best_paper}
 
 async def simplify_paper(state: ScholarState):
-    agent = SimplifierAgent()
+    agent = _agent(SimplifierAgent)
     print(f"\n[Graph] Simplifying Abstract: {state['best_paper']['title']}")
     insight = await agent.simplify(state["best_paper"], state["niche"])
     return {"insight": insight}
 
 async def write_blog(state: ScholarState):
-    agent = WriterAgent()
+    agent = _agent(WriterAgent)
     print(f"\n[Graph] Writing Blog Post...")
     
-    blog = await agent.write_blog(
+    # Stream the post so callers using stream_mode="custom" see it as it's written
+    writer = get_stream_writer()
+    parts = []
+    async for chunk in agent.write_blog_stream(
         state["insight"], 
         state["best_paper"], 
         state["niche"], 
         state["brand_voice"],
         rag_context=state.get("rag_context", "") 
+    ):
+        parts.append(chunk)
+        writer({"blog_chunk": chunk})
+    return {"final_blog": "".join(parts)}
+
+# Fast path: one LLM call produces both the insight and the post
+async def simplify_and_write(state: ScholarState):
+    agent = _agent(WriterAgent)
+    print(f"\n[Graph] Simplifying & Writing: {state['best_paper']['title']}")
+    result = await agent.simplify_and_write(
+        state["best_paper"], 
+        state["niche"], 
+        state["brand_voice"]
     )
-    return {"final_blog": blog}
+    
+    if not result:
+        # Structured output failed; fall back to the two-step path
+        update = await simplify_paper(state)
+        update.update(await write_blog({**state, **update}))
+        return update
+    
+    get_stream_writer()({"blog_chunk": result["blog"]})
+    return {"insight": result["insight"], "final_blog": result["blog"]}
 
 # [NEW] Vector RAG Node with ReAct
 async def deep_dive(state: ScholarState):
     paper = state["best_paper"]
     print(f"\n[Graph] 🤿 Deep Deep into PDF: {paper['title']}")
     
-    engine = RagEngine()
+    engine = _agent(RagEngine)
     
     # Download & Ingest
     pdf_url = paper['url']
-    path = engine.download_pdf(pdf_url)
+    path = await asyncio.to_thread(engine.download_pdf, pdf_url)
     if not path:
         return {"rag_context": "Could not download PDF."}
         
-    collection_name = engine.ingest_paper(path)
+    collection_name = await asyncio.to_thread(engine.ingest_paper, path)
     if not collection_name:
         return {"rag_context": "Could not ingest PDF."}
         
     # Run ReAct Loop
-    researcher = ReactResearcherAgent(engine)
+    researcher = _agent(ReactResearcherAgent, engine)
     context = await researcher.research(paper['title'], collection_name)
     
     return {"rag_context": context}
@@ -102,8 +137,8 @@ def route_after_filter(state: ScholarState):
     if state.get("mode") == "deep":
         return "deep_dive"
         
-    # Default to fast/simplify if not deep
-    return "simplify"
+    # Default to fast (fused simplify + write) if not deep
+    return "simplify_and_write"
 
 # 4. Build Graph
 workflow = StateGraph(ScholarState)
@@ -114,6 +149,7 @@ workflow.add_node("filter_papers", filter_papers)
 workflow.add_node("deep_dive", deep_dive) 
 workflow.add_node("simplify_paper", simplify_paper)
 workflow.add_node("write_blog", write_blog)
+workflow.add_node("simplify_and_write", simplify_and_write)
 
 workflow.set_entry_point("analyze_website")
 
@@ -126,7 +162,7 @@ workflow.add_conditional_edges(
     route_after_filter,
     {
         "deep_dive": "deep_dive",
-        "simplify": "simplify_paper",
+        "simplify_and_write": "simplify_and_write",
         "end": END
     }
 )
@@ -135,6 +171,7 @@ workflow.add_conditional_edges(
 workflow.add_edge("deep_dive", "simplify_paper") 
 workflow.add_edge("simplify_paper", "write_blog")
 workflow.add_edge("write_blog", END)
+workflow.add_edge("simplify_and_write", END)
 
 # Compile
 app = workflow.compile()
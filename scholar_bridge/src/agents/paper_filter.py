@@ -1,35 +1,71 @@
-import yaml
+import asyncio
+import hashlib
 import json
 from ..llm.gemini_client import GeminiClient
+from ..config_loader import load
 from ..utils.json_parser import extract_json
 
+# Upper bound on in-flight Gemini evaluations, to stay clear of rate limits.
+MAX_CONCURRENT_EVALS = 8
+
 class PaperFilterAgent:
     def __init__(self):
         self.llm = GeminiClient()
-        with open("scholar_bridge/config/prompt_templates.yaml", "r") as f:
-            self.prompts = yaml.safe_load(f)["paper_filter_agent"]
+        self.prompts = load("scholar_bridge/config/prompt_templates.yaml")["paper_filter_agent"]
 
     async def filter_papers(self, papers: list, niche: str) -> list:
         """
-        Evaluates a list of papers and returns only the relevant ones.
+        Evaluates a list of papers concurrently and returns only the relevant ones.
         """
-        valid_papers = []
-        
-        for paper in papers:
-            system_prompt = self.prompts["system_prompt"].format(niche=niche)
+        system_prompt = self.prompts["system_prompt"].format(niche=niche)
+        sem = asyncio.Semaphore(MAX_CONCURRENT_EVALS)
+
+        async def _eval(paper: dict):
             user_input = f"Title: {paper['title']}\nAbstract: {paper['abstract']}"
-            
-            response = await self.llm.generate(user_input, system_instruction=system_prompt)
+            async with sem:
+                response = await self.llm.generate(
+                    user_input, system_instruction=system_prompt, service_tier="patient"
+                )
             
             try:
                 evaluation = extract_json(response)
-                if evaluation.get("is_relevant", False):
-                    print(f"✅ Accepted: {paper['title']} (Score: {evaluation.get('business_impact_score')})")
-                    paper["evaluation"] = evaluation
-                    valid_papers.append(paper)
-                else:
-                    print(f"❌ Rejected: {paper['title']} (Reason: {evaluation.get('reason')})")
             except Exception as e:
                 print(f"Error parsing filter response for '{paper['title']}': {e}")
+                return paper, None
+
+            # A JSON array or scalar is not an evaluation; skip the paper
+            if not isinstance(evaluation, dict):
+                print(f"Unexpected filter response for '{paper['title']}': {response[:100]}")
+                return paper, None
+            return paper, evaluation
+
+        # Papers with identical title + abstract (v1/v2, cross-listings) share one evaluation
+        keys = [hashlib.sha1(f"{p['title']}\x00{p['abstract']}".encode()).hexdigest() for p in papers]
+        unique = {}
+        for key, paper in zip(keys, papers):
+            unique.setdefault(key, paper)
+
+        results = await asyncio.gather(*[_eval(p) for p in unique.values()], return_exceptions=True)
+        seen = dict(zip(unique.keys(), results))
+
+        # Walk `papers` rather than `unique` so the original ranking is kept
+        valid_papers = []
+        for key, paper in zip(keys, papers):
+            result = seen[key]
+            if isinstance(result, Exception):
+                print(f"Error evaluating '{paper['title']}': {result}")
+                continue
+
+            _, evaluation = result
+            if evaluation is None:
+                continue
+            evaluation = dict(evaluation)
+
+            if evaluation.get("is_relevant", False):
+                print(f"✅ Accepted: {paper['title']} (Score: {evaluation.get('business_impact_score')})")
+                paper["evaluation"] = evaluation
+                valid_papers.append(paper)
+            else:
+                print(f"❌ Rejected: {paper['title']} (Reason: {evaluation.get('reason')})")
                 
         return valid_papers
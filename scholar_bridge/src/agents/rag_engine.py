@@ -1,9 +1,45 @@
 import os
-import requests
+import hashlib
 import fitz # PyMuPDF
 import chromadb
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
 import google.generativeai as genai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
+from ..utils.http import SESSION
+from ..llm.gemini_client import _configure_genai
+from ..config_loader import DATA_DIR
+
+# genai.embed_content accepts a list of texts; 100 is the API's per-request cap.
+EMBED_BATCH_SIZE = 100
+
+# Streaming download settings; larger PDFs are rejected rather than risk OOM.
+DOWNLOAD_CHUNK_SIZE = 1 << 16
+MAX_PDF_BYTES = 100 * 1024 * 1024
+
+# Context filtering for queries: L2 distance cut-off (tuned for text-embedding-004)
+# and the default cap on chunks handed back to the LLM per query.
+MAX_QUERY_DISTANCE = 1.2
+MAX_CONTEXT_CHUNKS = 3
+
+# On-disk Chroma store, so papers ingested by earlier runs are reused.
+CHROMA_PATH = os.path.join(DATA_DIR, "chroma")
+
+# Step 5 & 10: Text/Query Embedding
+class GeminiEmbeddingFunction(EmbeddingFunction):
+    """Chroma embedding function backed by Gemini, batching inputs per API call."""
+
+    def __call__(self, input: Documents) -> Embeddings:
+        # Chroma 0.4 validates embeddings as plain lists of floats, which the API already returns
+        embeddings: Embeddings = []
+        for i in range(0, len(input), EMBED_BATCH_SIZE):
+            # Using a model optimized for retrieval
+            result = genai.embed_content(
+                model="models/text-embedding-004", 
+                content=input[i:i + EMBED_BATCH_SIZE],
+                task_type="retrieval_document"
+            )
+            embeddings.extend(result['embedding'])
+        return embeddings
 
 class RagEngine:
     """
@@ -19,24 +55,16 @@ class RagEngine:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found")
         
-        genai.configure(api_key=self.api_key)
-        self.client = chromadb.Client()
-        self.ef = self._google_embedding_function
-
-    # Step 5 & 10: Text/Query Embedding
-    def _google_embedding_function(self, input: List[str]) -> List[List[float]]:
-        # Using a model optimized for retrieval
-        result = genai.embed_content(
-            model="models/text-embedding-004", 
-            content=input,
-            task_type="retrieval_document"
-        )
-        return result['embedding']
+        # Shared with GeminiClient so the SDK's service clients are not reset
+        _configure_genai(self.api_key)
+        self.client = chromadb.PersistentClient(path=CHROMA_PATH)
+        self.ef = GeminiEmbeddingFunction()
 
     # Step 1: Source Identification (handled by caller, but we validate here)
     # Step 2: Data Ingestion
     def download_pdf(self, url: str) -> str:
         """Step 2: Downloads the raw data (PDF)."""
+        path = ""
         try:
             if "arxiv.org/abs/" in url:
                 url = url.replace("abs", "pdf")
@@ -44,19 +72,26 @@ class RagEngine:
                 url += ".pdf"
                 
             print(f"[Step 2] Ingesting Data from {url}...")
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
             filename = f"temp_{os.path.basename(url)}"
             if not filename.endswith(".pdf"): filename = "temp_paper.pdf"
-            path = os.path.join("scholar_bridge/data", filename)
+            path = os.path.join(DATA_DIR, filename)
             os.makedirs(os.path.dirname(path), exist_ok=True)
             
-            with open(path, "wb") as f:
-                f.write(response.content)
+            # Stream straight to disk so the PDF is never held in memory whole
+            with SESSION.get(url, timeout=30, stream=True) as response:
+                response.raise_for_status()
+                total = 0
+                with open(path, "wb") as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        total += len(chunk)
+                        if total > MAX_PDF_BYTES:
+                            raise ValueError(f"PDF too large (> {MAX_PDF_BYTES} bytes)")
+                        f.write(chunk)
             return path
         except Exception as e:
             print(f"Error in Step 2: {e}")
+            if path and os.path.exists(path):
+                os.remove(path)
             return ""
 
 
@@ -66,86 +101,153 @@ class RagEngine:
         Priority: Paragraphs (\n\n) -> Sentences (\n) -> Words ( ) -> Characters
         """
         separators = ["\n\n", "\n", " ", ""]
-        return self._recursive_split(text, separators, chunk_size, overlap)
+        chunks = self._recursive_split(text, 0, len(text), separators, chunk_size, overlap)
+        # Blank pages and whitespace-only windows would be embedded as empty documents
+        return [chunk for chunk in chunks if chunk.strip()]
+
+    @staticmethod
+    def _iter_splits(text: str, start: int, end: int, separator: str):
+        """Yields (start, end) offsets of the non-empty pieces of text[start:end] between separators."""
+        pos = start
+        while True:
+            nxt = text.find(separator, pos, end)
+            split_end = end if nxt == -1 else nxt
+            if split_end > pos:
+                yield pos, split_end
+            if nxt == -1:
+                return
+            pos = nxt + len(separator)
 
-    def _recursive_split(self, text: str, separators: List[str], chunk_size: int, overlap: int) -> List[str]:
+    @staticmethod
+    def _join_splits(text: str, splits: List[Tuple[int, int]], separator: str) -> str:
+        """
+        The splits joined by single separators. When the source span has no
+        separator runs it already is that string, so the slice is returned.
+        """
+        chunk = text[splits[0][0]:splits[-1][1]]
+        if separator * 2 in chunk:
+            return separator.join(text[s:e] for s, e in splits)
+        return chunk
+
+    def _recursive_split(
+        self, text: str, start: int, end: int, separators: List[str], chunk_size: int, overlap: int
+    ) -> List[str]:
+        """
+        Splits text[start:end] into chunks. Works on offsets into `text`, so
+        substrings are only built for emitted chunks. Runs of the separator
+        are collapsed to one, and lengths are measured on the collapsed text.
+        """
+        if start >= end:
+            return []
+        
         final_chunks = []
         
-        # Determine which separator to use
-        separator = separators[-1]
+        # Determine which separator to use ("" means none is left)
+        separator = ""
         new_separators = []
         for i, sep in enumerate(separators):
             if sep == "":
-                separator = ""
                 break
-            if sep in text:
+            if text.find(sep, start, end) != -1:
                 separator = sep
                 new_separators = separators[i+1:]
                 break
-                
-        # Split text by the chosen separator
-        splits = [s for s in text.split(separator) if s] if separator else list(text)
         
-        # Now merge splits into chunks
-        good_splits = []
+        if not separator:
+            # Hard cut into overlapping windows if no more separators
+            step = max(chunk_size - overlap, 1)
+            pos = start
+            while True:
+                final_chunks.append(text[pos:min(pos + chunk_size, end)])
+                if pos + chunk_size >= end:
+                    return final_chunks
+                pos += step
+        
         separator_len = len(separator)
         
-        current_chunk_splits = []
+        # (start, end) offsets of the splits in the current chunk, and its
+        # length as measured on the splits joined by single separators
+        current_splits: List[Tuple[int, int]] = []
         current_len = 0
         
-        for split in splits:
-            split_len = len(split)
+        for split_start, split_end in self._iter_splits(text, start, end, separator):
+            split_len = split_end - split_start
             
             # If a single split is too big, drill down recursively
             if split_len > chunk_size:
-                if current_chunk_splits:
+                if current_splits:
                     # Flush current buffer
-                    good_splits.append(separator.join(current_chunk_splits))
-                    current_chunk_splits = []
+                    final_chunks.append(self._join_splits(text, current_splits, separator))
+                    current_splits = []
                     current_len = 0
                 
                 # Recursively chunk this big split
-                if new_separators:
-                    sub_chunks = self._recursive_split(split, new_separators, chunk_size, overlap)
-                    good_splits.extend(sub_chunks)
-                else:
-                    # Hard cut if no more separators
-                    for i in range(0, len(split), chunk_size - overlap):
-                        good_splits.append(split[i:i+chunk_size])
+                final_chunks.extend(
+                    self._recursive_split(text, split_start, split_end, new_separators, chunk_size, overlap)
+                )
                 continue
 
             # Check if adding this split exceeds chunk_size
-            if current_len + split_len + (separator_len if current_chunk_splits else 0) > chunk_size:
+            if current_splits and current_len + separator_len + split_len > chunk_size:
                 # Chunk is full, add to list
-                good_splits.append(separator.join(current_chunk_splits))
+                final_chunks.append(self._join_splits(text, current_splits, separator))
                 
-                # Handle Overlap: Keep some previous splits for context
-                # Backtrack to find how much to keep
-                overlap_splits = []
-                overlap_len = 0
-                for s in reversed(current_chunk_splits):
-                    if overlap_len + len(s) + separator_len <= overlap:
-                        overlap_splits.insert(0, s)
-                        overlap_len += len(s) + separator_len
-                    else:
+                # Handle Overlap: Keep the trailing splits that fit within `overlap` chars
+                # (and still leave room for the incoming split)
+                kept = 0
+                kept_len = 0
+                for s, e in reversed(current_splits):
+                    candidate_len = kept_len + (e - s) + separator_len
+                    if candidate_len > overlap or candidate_len + split_len > chunk_size:
                         break
-                        
-                current_chunk_splits = list(overlap_splits)
-                current_len = overlap_len
+                    kept += 1
+                    kept_len = candidate_len
+                current_splits = current_splits[len(current_splits) - kept:]
+                # The carried length counts a separator after every kept split,
+                # and appending below adds one more, as the list-based splitter
+                # did; chunk boundaries stay where they always were
+                current_len = kept_len
                 
-            current_chunk_splits.append(split)
-            current_len += split_len + (separator_len if len(current_chunk_splits) > 1 else 0)
+            if current_splits:
+                current_len += separator_len
+            current_splits.append((split_start, split_end))
+            current_len += split_len
             
         # Flush remainder
-        if current_chunk_splits:
-            good_splits.append(separator.join(current_chunk_splits))
+        if current_splits:
+            final_chunks.append(self._join_splits(text, current_splits, separator))
             
-        return good_splits
+        return final_chunks
+
+    def _process_page(
+        self, page_num: int, page_text: str, source: str, chunk_size: int, overlap: int
+    ) -> Tuple[List[str], List[Dict[str, Any]]]:
+        """Steps 3, 4 & 6 for a single page: clean, chunk and tag with metadata."""
+        # Basic cleaning
+        text = page_text.replace('-\n', '').replace('\n', ' ')
+        
+        # Use Recursive Splitter
+        page_chunks = self._chunk_text(text, chunk_size, overlap)
+        
+        # Step 6: Metadata Tagging (chunk_id is assigned once all pages are merged)
+        metadatas = [{"source": source, "page": page_num + 1} for _ in page_chunks]
+        return page_chunks, metadatas
 
     def ingest_paper(self, pdf_path: str) -> str:
         """Orchestrates Steps 3-8."""
         if not pdf_path or not os.path.exists(pdf_path): return ""
 
+        # Collections are keyed by PDF content, so a paper seen before skips Steps 3-8
+        with open(pdf_path, "rb") as f:
+            collection_name = f"paper_{hashlib.sha1(f.read()).hexdigest()[:16]}"
+        try:
+            if self.client.get_collection(collection_name).count() > 0:
+                print(f"[Step 7] Reusing stored vectors from '{collection_name}'.")
+                return collection_name
+            self.client.delete_collection(collection_name)
+        except Exception:
+            pass
+
         try:
             # Step 3: Preprocessing (Read & Clean)
             print("[Step 3] Preprocessing PDF...")
@@ -160,46 +262,30 @@ class RagEngine:
             overlap = 200 
             
             print("[Step 4] Chunking Document (Recursive w/ Overlap)...")
-            global_idx = 0
             
             # Process entire doc text or page by page?
             # Recursive splitter works best on larger contexts, but page-by-page allows better metadata (Page Numbers).
             # We will maintain page-by-page but use recursive splitter on each page content.
-            
+            # Cleaning + chunking is pure Python and holds the GIL, so it runs serially.
+            source = os.path.basename(pdf_path)
             for page_num, page in enumerate(doc):
-                text = page.get_text()
-                # Basic cleaning
-                text = text.replace('-\n', '').replace('\n', ' ')
-                
-                # Use Recursive Splitter
-                page_chunks = self._chunk_text(text, chunk_size, overlap)
-                
-                for chunk_text in page_chunks:
+                page_chunks, page_metadatas = self._process_page(
+                    page_num, page.get_text(), source, chunk_size, overlap
+                )
+                for chunk_text, metadata in zip(page_chunks, page_metadatas):
+                    metadata["chunk_id"] = len(chunks)
+                    ids.append(str(len(chunks)))
                     chunks.append(chunk_text)
-                    
-                    # Step 6: Metadata Tagging
-                    metadatas.append({
-                        "source": os.path.basename(pdf_path),
-                        "page": page_num + 1,
-                        "chunk_id": global_idx
-                    })
-                    ids.append(str(global_idx))
-                    global_idx += 1
+                    metadatas.append(metadata)
+            doc.close()
 
             # Step 7: Vector Storage & Step 8: Index Optimization (Chroma handles HNSW)
             print(f"[Step 7] Storing {len(chunks)} Vectors in ChromaDB...")
-            collection_name = f"paper_{os.path.basename(pdf_path).replace('.pdf', '').replace('.', '_')}"
-            try: self.client.delete_collection(collection_name)
-            except: pass
-            
-            collection = self.client.create_collection(name=collection_name)
-            
-            # Step 5: Embedding (Batch)
-            embeddings = [self._google_embedding_function([c])[0] for c in chunks]
+            collection = self.client.create_collection(name=collection_name, embedding_function=self.ef)
             
+            # Step 5: Embedding (Batch) - the collection's embedding function embeds on insert
             collection.add(
                 documents=chunks,
-                embeddings=embeddings,
                 metadatas=metadatas,
                 ids=ids
             )
@@ -207,37 +293,48 @@ class RagEngine:
             
         except Exception as e:
             print(f"Error in Ingestion: {e}")
+            # Don't leave a half-filled collection behind for the next run to reuse
+            try: self.client.delete_collection(collection_name)
+            except Exception: pass
             return ""
 
     # Step 9-12: Retrieval
-    def query(self, collection_name: str, query_text: str, n_results=5) -> str:
-        """Orchestrates Steps 9-12."""
+    def query(self, collection_name: str, query_text: str, n_results=5, max_chunks=MAX_CONTEXT_CHUNKS) -> str:
+        """
+        Orchestrates Steps 9-12.
+        
+        Searches the top `n_results` chunks and returns at most
+        min(n_results, max_chunks) of those within MAX_QUERY_DISTANCE.
+        """
         if not collection_name: return ""
             
         try:
-            collection = self.client.get_collection(collection_name)
+            collection = self.client.get_collection(collection_name, embedding_function=self.ef)
             
             # Step 9: Query Handling (Input)
             # Step 10: Query Embedding
             # Step 11: Top K Similarity Search
             print(f"[Step 11] Searching for '{query_text}'...")
-            query_embed = self._google_embedding_function([query_text])[0]
-            
             results = collection.query(
-                query_embeddings=[query_embed],
-                n_results=n_results
+                query_texts=[query_text],
+                n_results=n_results,
+                include=["documents", "metadatas", "distances"]
             )
             
             # Step 12: Context Filtering (Thresholding)
-            # Chroma returns distances (L2). Lower is better. 
-            # Let's say we filter out very far chunks if needed. For now, we utilize all top-k.
-            
+            # Chroma returns distances (L2), already sorted ascending. Lower is better.
+            # Far-away chunks only inflate the downstream prompt, so drop them and cap the rest.
+            limit = min(n_results, max_chunks)
             valid_docs = []
             if results['documents']:
-                for i, doc in enumerate(results['documents'][0]):
-                    meta = results['metadatas'][0][i]
+                hits = zip(results['documents'][0], results['metadatas'][0], results['distances'][0])
+                for doc, meta, dist in hits:
+                    if dist >= MAX_QUERY_DISTANCE:
+                        continue
                     # Add Metadata context to the text
                     valid_docs.append(f"[Page {meta['page']}] {doc}")
+                    if len(valid_docs) >= limit:
+                        break
             
             return "\n\n".join(valid_docs)
             
@@ -1,18 +1,87 @@
 import re
+import asyncio
 from ..llm.gemini_client import GeminiClient
+from ..utils.json_parser import extract_json
 from .rag_engine import RagEngine
 
+# Matches "ACTION: QUERY: term" or just "QUERY: term", taking just the line
+_QUERY_RE = re.compile(r"QUERY:\s*([^\n]+)")
+_FINAL_RE = re.compile(r"FINAL REPORT:(.*)", re.DOTALL)
+
 class ReactResearcherAgent:
     def __init__(self, rag_engine: RagEngine):
         self.llm = GeminiClient()
         self.rag = rag_engine
         
+    async def _plan_queries(self, paper_title: str) -> list:
+        """
+        Asks the LLM once for the set of search terms the research needs.
+        """
+        system_prompt = (
+            "You are a Senior Technical Researcher planning a deep dive into a research paper.\n"
+            "List 3-4 distinct search terms to look up in the full paper text, covering: "
+            "the main methodology or algorithm, key metrics and results, and limitations.\n\n"
+            'Return JSON: {"queries": ["term", ...]}'
+        )
+        response = await self.llm.generate(f"Target Paper: {paper_title}", system_instruction=system_prompt)
+        
+        plan = extract_json(response)
+        # Accept a bare list of terms too; anything else counts as no plan
+        queries = plan.get("queries", []) if isinstance(plan, dict) else plan
+        if not isinstance(queries, list):
+            return []
+        return [q.strip() for q in queries if isinstance(q, str) and q.strip()][:4]
+
     async def research(self, paper_title: str, collection_name: str) -> str:
         """
-        Performs a deep dive research loop on the paper.
+        Performs a deep dive research on the paper.
+        
+        Plans all search terms in one LLM call, runs the PDF queries concurrently,
+        then synthesizes a report in a second call. Falls back to the step-by-step
+        ReAct loop if planning yields fewer than two terms.
         """
         print(f"[ReAct] Starting autonomous research on: {paper_title}")
         
+        queries = await self._plan_queries(paper_title)
+        if len(queries) < 2:
+            print("[ReAct] Query planning failed, falling back to ReAct loop.")
+            return await self._react_loop(paper_title, collection_name)
+        
+        for query_term in queries:
+            print(f"   >>> Tool Call: Searching PDF for '{query_term}'...")
+        tool_results = await asyncio.gather(*[
+            asyncio.to_thread(self.rag.query, collection_name, query_term, 2)
+            for query_term in queries
+        ])
+        
+        observations = "\n\n".join(
+            f"QUERY: {query_term}\nOBSERVATION: {tool_result}"
+            for query_term, tool_result in zip(queries, tool_results)
+        )
+        system_prompt = (
+            "You are a Senior Technical Researcher. Your goal is to extract specific, high-value technical details from a research paper to inform a business blog post.\n"
+            "You are given excerpts retrieved from the full paper text.\n"
+            "Summarize the Methodology, Key Results, and Limitations. "
+            "Output 'FINAL REPORT:' followed by your summary."
+        )
+        response = await self.llm.generate(
+            f"Target Paper: {paper_title}\n\n{observations}",
+            system_instruction=system_prompt
+        )
+        clean_response = response.strip()
+        
+        print("\n[ReAct Synthesis]")
+        print(clean_response)
+        
+        m_final = _FINAL_RE.search(clean_response)
+        if m_final:
+            return m_final.group(1).strip()
+        return clean_response or "Research incomplete. " + observations[-500:]
+
+    async def _react_loop(self, paper_title: str, collection_name: str) -> str:
+        """
+        Performs a step-by-step ReAct research loop on the paper.
+        """
         system_prompt = (
             "You are a Senior Technical Researcher. Your goal is to extract specific, high-value technical details from a research paper to inform a business blog post.\n"
             "You have access to the full paper text via a tool.\n\n"
@@ -47,24 +116,22 @@ class ReactResearcherAgent:
             history += f"\n{clean_response}\n"
             
             # 2. Act
-            if "FINAL REPORT:" in clean_response:
+            m_final = _FINAL_RE.search(clean_response)
+            if m_final:
                 # We are done
-                return clean_response.split("FINAL REPORT:", 1)[1].strip()
+                return m_final.group(1).strip()
             
-            if "QUERY:" in clean_response:
-                # Parse query using Regex to find "QUERY: <term>"
-                # Matches "ACTION: QUERY: term" or just "QUERY: term"
-                match = re.search(r"QUERY:\s*(.*)", clean_response)
-                if match:
-                    query_term = match.group(1).split("\n")[0].strip() # Take just the line
-                    
-                    print(f"   >>> Tool Call: Searching PDF for '{query_term}'...")
-                    tool_result = self.rag.query(collection_name, query_term, n_results=2)
-                    
-                    observation = f"OBSERVATION: {tool_result}"
-                    history += f"\n{observation}\n"
-                else:
-                    history += "\nOBSERVATION: Could not parse QUERY command. Please use format 'QUERY: <term>'\n"
+            m_q = _QUERY_RE.search(clean_response)
+            if m_q:
+                query_term = m_q.group(1).strip()
+                
+                print(f"   >>> Tool Call: Searching PDF for '{query_term}'...")
+                tool_result = self.rag.query(collection_name, query_term, n_results=2)
+                
+                observation = f"OBSERVATION: {tool_result}"
+                history += f"\n{observation}\n"
+            elif "QUERY:" in clean_response:
+                history += "\nOBSERVATION: Could not parse QUERY command. Please use format 'QUERY: <term>'\n"
             else:
                 # If the model didn't use a tool but didn't finish, nudge it
                 history += "\nOBSERVATION: Please use a QUERY or provide FINAL REPORT.\n"
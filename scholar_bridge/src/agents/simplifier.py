@@ -1,13 +1,12 @@
-import yaml
 import json
 from ..llm.gemini_client import GeminiClient
+from ..config_loader import load
 from ..utils.json_parser import extract_json
 
 class SimplifierAgent:
     def __init__(self):
         self.llm = GeminiClient()
-        with open("scholar_bridge/config/prompt_templates.yaml", "r") as f:
-            self.prompts = yaml.safe_load(f)["simplifier_agent"]
+        self.prompts = load("scholar_bridge/config/prompt_templates.yaml")["simplifier_agent"]
 
     async def simplify(self, paper: dict, niche: str) -> dict:
         """
@@ -1,53 +1,101 @@
-import requests
+import functools
+import hashlib
+import os
 from bs4 import BeautifulSoup
 from ..llm.gemini_client import GeminiClient
+from ..config_loader import load, DATA_DIR
 from ..utils.json_parser import extract_json
-import yaml
+from ..utils.http import SESSION
 import json
 
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401
+    BS4_PARSER = "lxml"
+except ImportError:
+    BS4_PARSER = "html.parser"
+
+CACHE_DIR = os.path.join(DATA_DIR, "cache", "website")
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# Modern User Agent
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5'
+}
+
+
+def _html_to_text(content: bytes) -> str:
+    """
+    Extracts visible text from raw HTML. Uses selectolax's Lexbor C parser when
+    available, otherwise BeautifulSoup (lxml if installed).
+    """
+    if HTMLParser is not None:
+        tree = HTMLParser(content)
+        
+        # Remove scripts and styles
+        for node in tree.css("script, style"):
+            node.decompose()
+            
+        root = tree.body or tree.root
+        return root.text(separator="\n") if root else ""
+    
+    soup = BeautifulSoup(content, BS4_PARSER)
+    
+    # Remove scripts and styles
+    for script in soup(["script", "style"]):
+        script.decompose()
+        
+    return soup.get_text()
+
+
+@functools.lru_cache(maxsize=128)
+def _fetch_text(url: str) -> str:
+    """
+    Fetches and cleans visible text from a URL. Memoized in-process; errors,
+    including 401/403 access denials, propagate (and so are not cached) for
+    the caller to handle.
+    """
+    response = SESSION.get(url, headers=HEADERS, timeout=10)
+    
+    # If 403/Forbidden, we can't scrape; raise so a transient denial isn't memoized
+    if response.status_code in [403, 401]:
+        raise PermissionError(f"Access denied ({response.status_code}) for {url}")
+        
+    response.raise_for_status()
+    
+    text = _html_to_text(response.content)
+    
+    # Clean up whitespace
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    clean_text = '\n'.join(chunk for chunk in chunks if chunk)
+    
+    return clean_text[:5000]
+
+
 class WebsiteAnalysisAgent:
     def __init__(self):
         self.llm = GeminiClient()
-        with open("scholar_bridge/config/prompt_templates.yaml", "r") as f:
-            self.prompts = yaml.safe_load(f)["website_analysis_agent"]
-    
-    # ... (scrape_text method remains unchanged) ...
+        self.prompts = load("scholar_bridge/config/prompt_templates.yaml")["website_analysis_agent"]
+        self.cache = diskcache.Cache(CACHE_DIR) if diskcache else None
 
     def scrape_text(self, url: str) -> str:
         """
         Scrapes visible text from a URL.
         """
         try:
-            # Modern User Agent
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5'
-            }
-            response = requests.get(url, headers=headers, timeout=10)
-            
-            # If 403/Forbidden, we can't scrape, but we shouldn't crash the whole app
-            if response.status_code in [403, 401]:
-                print(f"⚠️ Access denied (403) for {url}. Using fallback.")
-                return ""
-                
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Remove scripts and styles
-            for script in soup(["script", "style"]):
-                script.decompose()
-                
-            text = soup.get_text()
-            
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            clean_text = '\n'.join(chunk for chunk in chunks if chunk)
-            
-            return clean_text[:5000]
-            
+            return _fetch_text(url)
         except Exception as e:
             print(f"Error scraping {url}: {e}")
             return ""
@@ -57,6 +105,14 @@ class WebsiteAnalysisAgent:
         Analyzes the website and returns Brand/Niche info.
         """
         print(f"Analyzing website: {url}...")
+        
+        cache_key = hashlib.sha1(url.encode()).hexdigest()
+        if self.cache is not None:
+            cached = self.cache.get(cache_key)
+            if cached:
+                print("Using cached website analysis.")
+                return cached
+        
         website_text = self.scrape_text(url)
         
         # Fallback if scraping failed
@@ -74,7 +130,12 @@ class WebsiteAnalysisAgent:
         response_text = await self.llm.generate(user_prompt, system_instruction=system_prompt)
         
         try:
-            return extract_json(response_text)
+            analysis = extract_json(response_text)
         except Exception:
             print("Error parsing JSON response")
             return {"raw_response": response_text}
+        
+        # Only cache usable results; fallbacks and parse failures get retried next time
+        if self.cache is not None and isinstance(analysis, dict) and analysis.get("niche"):
+            self.cache.set(cache_key, analysis, expire=CACHE_TTL_SECONDS)
+        return analysis
@@ -1,15 +1,38 @@
-import yaml
+from typing import AsyncIterator, Tuple
 from ..llm.gemini_client import GeminiClient
+from ..config_loader import load
+from ..utils.json_parser import extract_json
+
+# Structured output for simplify_and_write: the simplifier's insight plus the post
+_INSIGHT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "main_discovery": {"type": "string"},
+        "business_implication": {"type": "string"},
+        "key_takeaway": {"type": "string"},
+    },
+    "required": ["main_discovery", "business_implication", "key_takeaway"],
+}
+SIMPLIFY_AND_WRITE_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "object",
+        "properties": {
+            "insight": _INSIGHT_SCHEMA,
+            "blog": {"type": "string"},
+        },
+        "required": ["insight", "blog"],
+    },
+}
 
 class WriterAgent:
     def __init__(self):
         self.llm = GeminiClient()
-        with open("scholar_bridge/config/prompt_templates.yaml", "r") as f:
-            self.prompts = yaml.safe_load(f)["writer_agent"]
+        self.prompts = load("scholar_bridge/config/prompt_templates.yaml")["writer_agent"]
 
-    async def write_blog(self, insight: dict, paper: dict, niche: str, brand_voice: str, rag_context: str = "") -> str:
+    def _build_prompts(self, insight: dict, paper: dict, niche: str, brand_voice: str, rag_context: str = "") -> Tuple[str, str]:
         """
-        Writes a blog post based on the distilled insight and optional RAG context.
+        Builds the (system_prompt, user_input) pair for a blog post.
         """
         # System prompt sets the persona
         system_prompt = self.prompts["system_prompt"].format(
@@ -36,6 +59,62 @@ class WriterAgent:
             )
             
         user_input += "Follow the structure: Hook, Science, So What?, Action Plan."
-        
+        return system_prompt, user_input
+
+    async def write_blog(self, insight: dict, paper: dict, niche: str, brand_voice: str, rag_context: str = "") -> str:
+        """
+        Writes a blog post based on the distilled insight and optional RAG context.
+        """
+        system_prompt, user_input = self._build_prompts(insight, paper, niche, brand_voice, rag_context)
         response = await self.llm.generate(user_input, system_instruction=system_prompt)
         return response
+
+    async def write_blog_stream(self, insight: dict, paper: dict, niche: str, brand_voice: str, rag_context: str = "") -> AsyncIterator[str]:
+        """
+        Same as `write_blog`, but yields the post in chunks as the LLM produces them.
+        """
+        system_prompt, user_input = self._build_prompts(insight, paper, niche, brand_voice, rag_context)
+        async for chunk in self.llm.generate_stream(user_input, system_instruction=system_prompt):
+            yield chunk
+
+    async def simplify_and_write(self, paper: dict, niche: str, brand_voice: str, rag_context: str = "") -> dict:
+        """
+        Distills the abstract and writes the blog post in a single LLM call.
+        Returns {"insight": dict, "blog": str}, or {} if the response is unusable.
+        """
+        system_prompt = self.prompts["simplify_and_write_prompt"].format(
+            niche=niche,
+            brand_voice=brand_voice
+        )
+        
+        user_input = (
+            f"Paper Title: {paper['title']}\n\n"
+            f"Abstract:\n{paper['abstract']}\n\n"
+            f"Write a blog post titled 'Why {paper['title']} Matters for {niche}'.\n\n"
+        )
+        
+        if rag_context:
+            user_input += (
+                f"Deep Dive Facts (From Full PDF):\n"
+                f"{rag_context}\n\n"
+                f"INSTRUCTION: Incorporate specific metrics, methodologies, or quotes from the 'Deep Dive Facts' to make the post authoritative.\n\n"
+            )
+            
+        user_input += "Follow the structure: Hook, Science, So What?, Action Plan."
+        
+        response = await self.llm.generate(
+            user_input,
+            system_instruction=system_prompt,
+            generation_config=SIMPLIFY_AND_WRITE_CONFIG
+        )
+        
+        try:
+            result = extract_json(response)
+        except Exception as e:
+            print(f"Error in simplify_and_write for '{paper['title']}': {e}")
+            return {}
+        if not isinstance(result, dict):
+            return {}
+        if not isinstance(result.get("insight"), dict) or not result.get("blog"):
+            return {}
+        return result
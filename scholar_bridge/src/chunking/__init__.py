@@ -10,6 +10,9 @@ Components:
 - MetadataEnricher: Enriches chunks with section labels, page numbers, and semantic tags
 """
 
+import functools
+import hashlib
+import re
 from typing import TypedDict, Optional, List
 
 
@@ -43,13 +46,36 @@ SECTION_PATTERNS = {
     "references": r"^references?\s*$|^bibliography"
 }
 
+# Compiled once at import; shared by every chunker/enricher instance
+COMPILED_SECTION_PATTERNS = {
+    section: re.compile(pattern, re.IGNORECASE | re.MULTILINE)
+    for section, pattern in SECTION_PATTERNS.items()
+}
+
+# All sections as one alternation of named groups: a single match() per line
+# identifies the section via `m.lastgroup`, trying sections in the order above.
+SECTION_HEADER_PATTERN = re.compile(
+    "|".join(f"(?P<{section}>{pattern})" for section, pattern in SECTION_PATTERNS.items()),
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+@functools.lru_cache(maxsize=256)
+def source_hash(source: str) -> str:
+    """Short, stable hash of a source identifier, used as a chunk ID prefix."""
+    return hashlib.blake2b(source.encode(), digest_size=4).hexdigest()
+
 
 __all__ = [
     "Chunk",
     "ChunkMetadata",
     "SECTION_PATTERNS",
+    "COMPILED_SECTION_PATTERNS",
+    "SECTION_HEADER_PATTERN",
+    "source_hash",
     "SemanticChunker",
     "ChunkConfig",
+    "ChunkStore",
     "OverlapManager",
     "OverlapConfig",
     "MetadataEnricher",
@@ -57,6 +83,6 @@ __all__ = [
 ]
 
 # Import after defining types to avoid circular imports
-from .semantic_chunker import SemanticChunker, ChunkConfig
+from .semantic_chunker import SemanticChunker, ChunkConfig, ChunkStore
 from .overlap_manager import OverlapManager, OverlapConfig
 from .metadata_enricher import MetadataEnricher, EnricherConfig
@@ -6,11 +6,63 @@ section labels, hierarchical IDs, and optional LLM-based semantic tagging.
 """
 
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from collections import OrderedDict
+from typing import AsyncIterator, List, Optional, Dict, Any, Tuple
+import asyncio
+import bisect
 import re
 import hashlib
 
-from . import Chunk, ChunkMetadata, SECTION_PATTERNS
+from . import Chunk, ChunkMetadata, COMPILED_SECTION_PATTERNS, SECTION_HEADER_PATTERN, source_hash
+
+_PAGE_PATTERN = re.compile(r'\bpage\s*(\d+)\b', re.IGNORECASE)
+_TAG_LINE_PATTERN = re.compile(r'Chunk\s*(\d+):\s*(.+)', re.IGNORECASE)
+
+# Content heuristics for chunks without a header, in priority order
+_SECTION_KEYWORDS = {
+    "introduction": ['we propose', 'this paper', 'we present', 'in this work'],
+    "methods": ['experiment', 'dataset', 'training', 'evaluation'],
+    "results": ['accuracy', 'performance', 'table', 'figure', 'results show'],
+    "conclusion": ['limitation', 'future work', 'in conclusion', 'we have shown'],
+}
+_KEYWORD_RANK = {
+    keyword: rank
+    for rank, keywords in enumerate(_SECTION_KEYWORDS.values())
+    for keyword in keywords
+}
+_KEYWORD_SECTIONS = list(_SECTION_KEYWORDS)
+# One scan of the lowercased text finds every keyword. Matching the lowered
+# text (not re.IGNORECASE) keeps every match a _KEYWORD_RANK key: IGNORECASE
+# also folds non-ASCII variants such as 'ſ' and the Kelvin sign.
+_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, _KEYWORD_RANK)))
+
+# Characters of each chunk shown to the LLM when tagging
+_TAG_SNIPPET_CHARS = 500
+
+# Tags remembered per enricher (keyed by chunk text hash) across calls
+_TAG_CACHE_SIZE = 4096
+
+
+def _tag_cache_key(text_bytes: bytes) -> bytes:
+    """Key of `MetadataEnricher._tag_cache` for a chunk's UTF-8 text."""
+    return hashlib.blake2b(text_bytes, digest_size=8).digest()
+
+
+def _first_n_lines(text: str, n: int) -> List[str]:
+    """
+    Equivalent to `text.split('\n')[:n]`, but only scans and copies the
+    first n lines instead of splitting the whole text.
+    """
+    lines = []
+    start = 0
+    for _ in range(n):
+        end = text.find('\n', start)
+        if end == -1:
+            lines.append(text[start:])
+            break
+        lines.append(text[start:end])
+        start = end + 1
+    return lines
 
 
 @dataclass
@@ -19,6 +71,8 @@ class EnricherConfig:
     semantic_tagging: bool = False  # LLM-based tagging (expensive)
     hierarchical_ids: bool = True  # Generate hierarchical chunk IDs
     extract_page_numbers: bool = True  # Extract page numbers from text
+    max_concurrency: int = 8  # Max tagging LLM calls in flight at once
+    tagging_char_budget: int = 16000  # Max chunk text per tagging prompt
 
 
 class MetadataEnricher:
@@ -43,10 +97,8 @@ class MetadataEnricher:
         """
         self.config = config or EnricherConfig()
         self.llm_client = llm_client
-        self._compiled_patterns = {
-            section: re.compile(pattern, re.IGNORECASE | re.MULTILINE)
-            for section, pattern in SECTION_PATTERNS.items()
-        }
+        self._compiled_patterns = COMPILED_SECTION_PATTERNS
+        self._tag_cache: "OrderedDict[bytes, Tuple[str, ...]]" = OrderedDict()
     
     def enrich(
         self,
@@ -56,6 +108,8 @@ class MetadataEnricher:
         """
         Enrich chunks with additional metadata.
         
+        Chunks are updated in place (id and metadata) to avoid per-chunk copies.
+        
         Args:
             chunks: List of chunks to enrich.
             pdf_metadata: Optional PDF metadata with page information.
@@ -66,42 +120,46 @@ class MetadataEnricher:
         if not chunks:
             return []
         
-        enriched = []
+        page_index = self._prepare_page_index(pdf_metadata) if pdf_metadata else None
+        section_first_chunk: Dict[str, str] = {}
         
         for i, chunk in enumerate(chunks):
-            enriched_chunk = self._enrich_chunk(chunk, i, len(chunks), pdf_metadata)
-            enriched.append(enriched_chunk)
-        
-        # Build parent-child relationships
-        if self.config.hierarchical_ids:
-            enriched = self._assign_parent_relationships(enriched)
+            self._enrich_chunk(chunk, i, len(chunks), pdf_metadata, page_index)
+            
+            # Build parent-child relationships in the same pass
+            if self.config.hierarchical_ids:
+                self._link_parent(chunk, section_first_chunk)
         
-        return enriched
+        return chunks
     
     def _enrich_chunk(
         self,
         chunk: Chunk,
         index: int,
         total_chunks: int,
-        pdf_metadata: Optional[Dict[str, Any]] = None
+        pdf_metadata: Optional[Dict[str, Any]] = None,
+        page_index: Optional[Tuple[List[int], List[int]]] = None,
+        tag_keys: Optional[List[bytes]] = None
     ) -> Chunk:
         """
-        Enrich a single chunk with metadata.
+        Enrich a single chunk with metadata, in place.
         
         Args:
             chunk: The chunk to enrich.
             index: Index of the chunk in the list.
             total_chunks: Total number of chunks.
             pdf_metadata: Optional PDF metadata.
+            page_index: Optional result of `_prepare_page_index(pdf_metadata)`.
+            tag_keys: If given, the chunk's tag-cache key is appended to it.
             
         Returns:
-            Enriched chunk.
+            The same chunk, enriched.
         """
-        new_metadata = dict(chunk["metadata"])
+        new_metadata = chunk["metadata"]
         
         # Extract page number
         if self.config.extract_page_numbers and pdf_metadata:
-            page = self._extract_page_number(chunk, pdf_metadata)
+            page = self._extract_page_number(chunk, pdf_metadata, page_index)
             new_metadata["page"] = page
         
         # Assign section label if not already set
@@ -110,27 +168,45 @@ class MetadataEnricher:
             if section:
                 new_metadata["section"] = section
         
+        # The content hash and the tag-cache key share one UTF-8 encoding
+        text_bytes = None
+        if self.config.hierarchical_ids or tag_keys is not None:
+            text_bytes = chunk["text"].encode("utf-8")
+        
         # Generate hierarchical ID
         if self.config.hierarchical_ids:
-            new_id = self._generate_hierarchical_id(
-                chunk["metadata"]["source"],
+            chunk["id"] = self._generate_hierarchical_id(
+                new_metadata["source"],
                 new_metadata["section"],
                 index,
-                chunk["text"]
+                chunk["text"],
+                text_bytes
             )
-        else:
-            new_id = chunk["id"]
         
-        return {
-            "id": new_id,
-            "text": chunk["text"],
-            "metadata": new_metadata,
-        }
+        if tag_keys is not None:
+            tag_keys.append(_tag_cache_key(text_bytes))
+        
+        return chunk
+    
+    @staticmethod
+    def _prepare_page_index(pdf_metadata: Dict[str, Any]) -> Tuple[List[int], List[int]]:
+        """
+        Sort the page_map (char_offset -> page) once for binary search.
+        
+        Args:
+            pdf_metadata: PDF metadata containing page mappings.
+            
+        Returns:
+            (sorted_offsets, pages) as parallel lists.
+        """
+        items = sorted((int(offset), page) for offset, page in pdf_metadata.get("page_map", {}).items())
+        return [offset for offset, _ in items], [page for _, page in items]
     
     def _extract_page_number(
         self,
         chunk: Chunk,
-        pdf_metadata: Dict[str, Any]
+        pdf_metadata: Dict[str, Any],
+        page_index: Optional[Tuple[List[int], List[int]]] = None
     ) -> int:
         """
         Extract page number for a chunk from PDF metadata.
@@ -138,16 +214,19 @@ class MetadataEnricher:
         Args:
             chunk: The chunk to get page number for.
             pdf_metadata: PDF metadata containing page mappings.
+            page_index: Optional precomputed `_prepare_page_index` result.
             
         Returns:
             Page number (0 if not found).
         """
         # Check if pdf_metadata contains page_map (char_offset -> page)
-        page_map = pdf_metadata.get("page_map", {})
+        if page_index is None:
+            page_index = self._prepare_page_index(pdf_metadata)
+        sorted_offsets, pages = page_index
         
-        if not page_map:
+        if not sorted_offsets:
             # Try to extract from chunk text patterns like "Page X" or "[X]"
-            page_pattern = re.search(r'\bpage\s*(\d+)\b', chunk["text"], re.IGNORECASE)
+            page_pattern = _PAGE_PATTERN.search(chunk["text"])
             if page_pattern:
                 return int(page_pattern.group(1))
             return 0
@@ -155,12 +234,9 @@ class MetadataEnricher:
         # Use character offset mapping if available
         chunk_start = pdf_metadata.get("chunk_offsets", {}).get(chunk["id"], 0)
         
-        # Find the page for this offset
-        for offset, page in sorted(page_map.items()):
-            if chunk_start >= int(offset):
-                return page
-        
-        return 0
+        # Find the page whose start offset is the last one at or before chunk_start
+        idx = bisect.bisect_right(sorted_offsets, chunk_start) - 1
+        return pages[idx] if idx >= 0 else 0
     
     def _detect_section(self, text: str) -> Optional[str]:
         """
@@ -173,34 +249,29 @@ class MetadataEnricher:
             Section name or None if not detected.
         """
         # Check first few lines for section headers
-        lines = text.split('\n')[:5]
+        lines = _first_n_lines(text, 5)
         
         for line in lines:
-            stripped = line.strip()
-            for section_name, pattern in self._compiled_patterns.items():
-                if pattern.match(stripped):
-                    return section_name
-        
-        # Heuristic detection based on content
-        text_lower = text.lower()
-        
-        if any(kw in text_lower for kw in ['we propose', 'this paper', 'we present', 'in this work']):
-            return "introduction"
-        if any(kw in text_lower for kw in ['experiment', 'dataset', 'training', 'evaluation']):
-            return "methods"
-        if any(kw in text_lower for kw in ['accuracy', 'performance', 'table', 'figure', 'results show']):
-            return "results"
-        if any(kw in text_lower for kw in ['limitation', 'future work', 'in conclusion', 'we have shown']):
-            return "conclusion"
-        
-        return None
+            match = SECTION_HEADER_PATTERN.match(line.strip())
+            if match:
+                return match.lastgroup
+        
+        # Heuristic detection based on content: highest-priority keyword wins
+        best = len(_KEYWORD_SECTIONS)
+        for match in _KEYWORD_PATTERN.finditer(text.lower()):
+            best = min(best, _KEYWORD_RANK[match.group()])
+            if best == 0:
+                break
+        
+        return _KEYWORD_SECTIONS[best] if best < len(_KEYWORD_SECTIONS) else None
     
     def _generate_hierarchical_id(
         self,
         source: str,
         section: str,
         index: int,
-        text: str
+        text: str,
+        text_bytes: Optional[bytes] = None
     ) -> str:
         """
         Generate a hierarchical chunk ID.
@@ -212,74 +283,163 @@ class MetadataEnricher:
             section: Section name.
             index: Chunk index.
             text: Chunk text for content hash.
+            text_bytes: Optional UTF-8 encoding of `text`, if the caller has it.
             
         Returns:
             Hierarchical chunk ID.
         """
         # Create short hash of source
-        source_hash = hashlib.md5(source.encode()).hexdigest()[:8]
+        source_digest = source_hash(source)
         
-        # Create short hash of content for uniqueness
-        content_hash = hashlib.md5(text.encode()).hexdigest()[:6]
+        # Create short hash of content for uniqueness (blake2b emits just the
+        # 3 bytes needed instead of a full digest that gets truncated)
+        if text_bytes is None:
+            text_bytes = text.encode()
+        content_hash = hashlib.blake2b(text_bytes, digest_size=3).hexdigest()
         
         # Sanitize section name
         section_clean = section.replace(" ", "_").lower() if section else "unknown"
         
-        return f"{source_hash}_{section_clean}_{index:04d}_{content_hash}"
+        return f"{source_digest}_{section_clean}_{index:04d}_{content_hash}"
     
-    def _assign_parent_relationships(self, chunks: List[Chunk]) -> List[Chunk]:
+    def _assign_parent_relationships(
+        self,
+        chunks: List[Chunk],
+        section_first_chunk: Optional[Dict[str, str]] = None
+    ) -> List[Chunk]:
         """
         Assign parent-child relationships between chunks.
         
         Chunks in the same section share a parent relationship.
         
         Args:
-            chunks: List of chunks to process.
+            chunks: List of chunks to process (updated in place).
+            section_first_chunk: Optional section -> parent ID map carried
+                across calls, so a document can be processed in pieces.
             
         Returns:
             Chunks with parent_chunk_id assigned.
         """
         # Group chunks by section
-        section_first_chunk: Dict[str, str] = {}
-        result = []
+        if section_first_chunk is None:
+            section_first_chunk = {}
         
         for chunk in chunks:
-            section = chunk["metadata"]["section"]
-            
-            if section not in section_first_chunk:
-                # This is the first chunk of this section (parent)
-                section_first_chunk[section] = chunk["id"]
-                parent_id = None
-            else:
-                # This chunk's parent is the first chunk of its section
-                parent_id = section_first_chunk[section]
-            
-            # Update metadata with parent ID
-            new_metadata = dict(chunk["metadata"])
-            new_metadata["parent_chunk_id"] = parent_id
-            
-            result.append({
-                "id": chunk["id"],
-                "text": chunk["text"],
-                "metadata": new_metadata,
-            })
+            self._link_parent(chunk, section_first_chunk)
+        
+        return chunks
+    
+    @staticmethod
+    def _link_parent(chunk: Chunk, section_first_chunk: Dict[str, str]) -> None:
+        """
+        Set one chunk's parent_chunk_id from the first chunk of its section.
+        
+        Args:
+            chunk: Chunk to update in place.
+            section_first_chunk: Section -> parent ID map, updated as sections appear.
+        """
+        section = chunk["metadata"]["section"]
         
-        return result
+        if section not in section_first_chunk:
+            # This is the first chunk of this section (parent)
+            section_first_chunk[section] = chunk["id"]
+            parent_id = None
+        else:
+            # This chunk's parent is the first chunk of its section
+            parent_id = section_first_chunk[section]
+        
+        # Update metadata with parent ID
+        chunk["metadata"]["parent_chunk_id"] = parent_id
 
     
+    async def enrich_stream(
+        self,
+        chunks: List[Chunk],
+        pdf_metadata: Optional[Dict[str, Any]] = None,
+        batch_size: Optional[int] = None
+    ) -> AsyncIterator[Chunk]:
+        """
+        Pipelined `enrich` + `enrich_with_semantic_tags`.
+        
+        Chunks are processed in tagging-sized groups: each group is enriched
+        on a worker thread while earlier groups are out at the LLM, so total
+        time approaches the slower of the two stages rather than their sum.
+        Chunks are yielded in input order as their group finishes.
+        
+        Args:
+            chunks: List of chunks to enrich (updated in place).
+            pdf_metadata: Optional PDF metadata with page information.
+            batch_size: Optional cap on chunks per LLM call.
+            
+        Yields:
+            Enriched (and, if enabled, tagged) chunks.
+        """
+        if not chunks:
+            return
+        
+        total = len(chunks)
+        page_index = self._prepare_page_index(pdf_metadata) if pdf_metadata else None
+        section_first_chunk: Dict[str, str] = {}
+        tagging = self.config.semantic_tagging and self.llm_client is not None
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def _enrich_group(group: List[Chunk], offset: int) -> Optional[List[bytes]]:
+            # Tag-cache keys come from the same encoding as the chunk ids
+            keys = [] if tagging else None
+            for i, chunk in enumerate(group, offset):
+                self._enrich_chunk(chunk, i, total, pdf_metadata, page_index, keys)
+                if self.config.hierarchical_ids:
+                    self._link_parent(chunk, section_first_chunk)
+            return keys
+        
+        async def _tag(group: List[Chunk], keys: Optional[List[bytes]]) -> List[Chunk]:
+            async with semaphore:
+                return await self.enrich_with_semantic_tags(group, batch_size, keys)
+        
+        async def _produce() -> None:
+            try:
+                offset = 0
+                for group in self._split_for_tagging(chunks, batch_size):
+                    keys = await asyncio.to_thread(_enrich_group, group, offset)
+                    offset += len(group)
+                    await queue.put(asyncio.ensure_future(_tag(group, keys)))
+            finally:
+                await queue.put(None)
+        
+        producer = asyncio.ensure_future(_produce())
+        pending = []
+        try:
+            while (task := await queue.get()) is not None:
+                pending.append(task)
+                for chunk in await task:
+                    yield chunk
+            await producer
+        finally:
+            producer.cancel()
+            for task in pending:
+                task.cancel()
+    
     async def enrich_with_semantic_tags(
         self,
         chunks: List[Chunk],
-        batch_size: int = 5
+        batch_size: Optional[int] = None,
+        keys: Optional[List[bytes]] = None
     ) -> List[Chunk]:
         """
         Enrich chunks with LLM-generated semantic tags.
         
         This is an expensive operation that calls the LLM for each batch.
+        Batches are filled up to `config.tagging_char_budget` characters of
+        chunk text and run concurrently, at most `config.max_concurrency` at a time.
+        Chunks with identical text are tagged once, and tags for text seen in
+        earlier calls are reused without calling the LLM.
         
         Args:
             chunks: List of chunks to tag.
-            batch_size: Number of chunks to process per LLM call.
+            batch_size: Optional cap on chunks per LLM call (default: budget only).
+            keys: Optional tag-cache key per chunk, if the caller already
+                hashed the texts (as `enrich_stream` does).
             
         Returns:
             Chunks with semantic_tags populated.
@@ -287,21 +447,80 @@ class MetadataEnricher:
         if not self.config.semantic_tagging or not self.llm_client:
             return chunks
         
-        result = []
+        # One representative per distinct text that isn't already cached
+        if keys is None:
+            keys = [_tag_cache_key(chunk["text"].encode("utf-8")) for chunk in chunks]
+        pending: Dict[bytes, Chunk] = {}
+        for key, chunk in zip(keys, chunks):
+            if key not in self._tag_cache and key not in pending:
+                pending[key] = chunk
+        
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        
+        async def _run(batch: List[Chunk]) -> List[Chunk]:
+            async with semaphore:
+                return await self._tag_batch(batch)
+        
+        await asyncio.gather(*(
+            _run(batch) for batch in self._split_for_tagging(list(pending.values()), batch_size)
+        ))
+        
+        fresh = {key: tuple(chunk["metadata"]["semantic_tags"]) for key, chunk in pending.items()}
+        for key, tags in fresh.items():
+            # Empty tags usually mean a failed call; let a later run retry them
+            if tags:
+                self._tag_cache[key] = tags
+        
+        for key, chunk in zip(keys, chunks):
+            tags = fresh.get(key)
+            if tags is None:
+                tags = self._tag_cache[key]
+                self._tag_cache.move_to_end(key)
+            chunk["metadata"]["semantic_tags"] = list(tags)
+        
+        while len(self._tag_cache) > _TAG_CACHE_SIZE:
+            self._tag_cache.popitem(last=False)
+        
+        return chunks
+    
+    def _split_for_tagging(
+        self,
+        chunks: List[Chunk],
+        batch_size: Optional[int] = None
+    ) -> List[List[Chunk]]:
+        """
+        Group chunks into as few tagging requests as the character budget allows.
         
-        for i in range(0, len(chunks), batch_size):
-            batch = chunks[i:i + batch_size]
-            tagged_batch = await self._tag_batch(batch)
-            result.extend(tagged_batch)
+        Args:
+            chunks: Chunks to tag.
+            batch_size: Optional cap on chunks per group.
+            
+        Returns:
+            Consecutive groups of chunks, one per LLM call.
+        """
+        budget = self.config.tagging_char_budget
+        batches: List[List[Chunk]] = []
+        current: List[Chunk] = []
+        used = 0
         
-        return result
+        for chunk in chunks:
+            size = min(len(chunk["text"]), _TAG_SNIPPET_CHARS)
+            if current and (used + size > budget or (batch_size and len(current) >= batch_size)):
+                batches.append(current)
+                current, used = [], 0
+            current.append(chunk)
+            used += size
+        
+        if current:
+            batches.append(current)
+        return batches
     
     async def _tag_batch(self, chunks: List[Chunk]) -> List[Chunk]:
         """
         Generate semantic tags for a batch of chunks.
         
         Args:
-            chunks: Batch of chunks to tag.
+            chunks: Batch of chunks to tag (updated in place).
             
         Returns:
             Chunks with semantic tags.
@@ -319,18 +538,10 @@ class MetadataEnricher:
             # On error, return chunks without tags
             tags_map = {i: [] for i in range(len(chunks))}
         
-        result = []
         for i, chunk in enumerate(chunks):
-            new_metadata = dict(chunk["metadata"])
-            new_metadata["semantic_tags"] = tags_map.get(i, [])
-            
-            result.append({
-                "id": chunk["id"],
-                "text": chunk["text"],
-                "metadata": new_metadata,
-            })
+            chunk["metadata"]["semantic_tags"] = tags_map.get(i, [])
         
-        return result
+        return chunks
     
     def _build_tagging_prompt(self, chunks: List[Chunk]) -> str:
         """
@@ -343,7 +554,7 @@ class MetadataEnricher:
             Prompt string.
         """
         chunks_text = "\n\n".join([
-            f"[Chunk {i}]\n{chunk['text'][:500]}..."
+            f"[Chunk {i}]\n{chunk['text'][:_TAG_SNIPPET_CHARS]}..."
             for i, chunk in enumerate(chunks)
         ])
         
@@ -376,7 +587,7 @@ Chunk 1: tag1, tag2
         tags_map = {}
         
         for line in response.split('\n'):
-            match = re.match(r'Chunk\s*(\d+):\s*(.+)', line, re.IGNORECASE)
+            match = _TAG_LINE_PATTERN.match(line)
             if match:
                 idx = int(match.group(1))
                 tags = [t.strip() for t in match.group(2).split(',')]
@@ -408,5 +619,7 @@ Chunk 1: tag1, tag2
             semantic_tagging=config_dict.get("semantic_tagging", False),
             hierarchical_ids=config_dict.get("hierarchical_ids", True),
             extract_page_numbers=config_dict.get("extract_page_numbers", True),
+            max_concurrency=config_dict.get("max_concurrency", 8),
+            tagging_char_budget=config_dict.get("tagging_char_budget", 16000),
         )
         return MetadataEnricher(config, llm_client)
@@ -8,7 +8,10 @@ text chunks to preserve context across chunk boundaries.
 from dataclasses import dataclass
 from typing import List, Tuple, Optional
 
+import numpy as np
+
 from . import Chunk, ChunkMetadata
+from ._overlap_kernel import compute_overlaps
 
 
 @dataclass
@@ -88,18 +91,25 @@ class OverlapManager:
             overlap_percent: Override the default overlap percentage.
             
         Returns:
-            New list of chunks with overlap applied.
+            List of chunks with overlap applied. Metadata of the input chunks
+            is updated in place; chunks whose text changes are new objects.
         """
         if not chunks:
             return []
         
         if len(chunks) == 1:
-            # Single chunk - no overlap needed
-            return [self._copy_chunk_with_overlap(chunks[0], 0, 0)]
+            # Single chunk - no overlap needed, just reset its overlap fields
+            metadata = chunks[0]["metadata"]
+            metadata["overlap_with_prev"] = 0
+            metadata["overlap_with_next"] = 0
+            return chunks
         
         # Use provided overlap_percent or default
         effective_percent = overlap_percent if overlap_percent is not None else self.config.overlap_percent
         
+        # Overlap between each consecutive pair, computed for all pairs at once
+        pair_overlaps = self._calculate_overlap_sizes(chunks, effective_percent)
+        
         result = []
         
         for i, chunk in enumerate(chunks):
@@ -110,33 +120,26 @@ class OverlapManager:
             # Calculate and apply overlap from previous chunk
             if i > 0:
                 prev_chunk = chunks[i - 1]
-                overlap_size = self._calculate_overlap_size(
-                    prev_chunk["text"], 
-                    chunk["text"], 
-                    effective_percent
-                )
+                overlap_size = pair_overlaps[i - 1]
                 
                 if overlap_size > 0:
-                    overlap_content = self._get_overlap_content(
-                        prev_chunk["text"], 
+                    # Work on indices into the previous text; slice only once
+                    prev_text = prev_chunk["text"]
+                    start, end = self._find_overlap_span(
+                        prev_text, 
                         overlap_size, 
                         from_end=True
                     )
+                    strip_start, strip_end = self._strip_bounds(prev_text, start, end)
                     
                     # Only prepend if not already present
-                    if not new_text.startswith(overlap_content.strip()):
-                        new_text = overlap_content.rstrip() + " " + new_text
-                        overlap_prev = len(overlap_content)
+                    if not self._starts_with_span(new_text, prev_text, strip_start, strip_end):
+                        new_text = "".join((prev_text[start:strip_end], " ", new_text))
+                        overlap_prev = end - start
             
             # Calculate overlap with next chunk (for metadata tracking)
             if i < len(chunks) - 1:
-                next_chunk = chunks[i + 1]
-                overlap_size = self._calculate_overlap_size(
-                    chunk["text"], 
-                    next_chunk["text"], 
-                    effective_percent
-                )
-                overlap_next = overlap_size
+                overlap_next = pair_overlaps[i]
             
             # Create new chunk with updated text and metadata
             new_chunk = self._copy_chunk_with_overlap(
@@ -149,6 +152,30 @@ class OverlapManager:
         
         return result
     
+    def _calculate_overlap_sizes(
+        self,
+        chunks: List[Chunk],
+        overlap_percent: int
+    ) -> List[int]:
+        """
+        Vectorized `_calculate_overlap_size` over every consecutive chunk pair.
+        
+        Args:
+            chunks: List of chunks.
+            overlap_percent: Percentage of overlap.
+            
+        Returns:
+            Overlap sizes, where entry i is the overlap between chunks i and i+1.
+        """
+        lengths = np.fromiter((len(c["text"]) for c in chunks), dtype=np.int64, count=len(chunks))
+        overlap = compute_overlaps(
+            lengths,
+            overlap_percent,
+            self.config.min_overlap_chars,
+            self.config.max_overlap_chars
+        )
+        return overlap.tolist()
+    
     def _calculate_overlap_size(
         self,
         text_a: str,
@@ -179,14 +206,54 @@ class OverlapManager:
         
         return overlap
     
-    def _get_overlap_content(
+    @staticmethod
+    def _strip_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+        """
+        Bounds of `text[start:end].strip()` within `text`, without slicing.
+        
+        Args:
+            text: Source text.
+            start: Span start index.
+            end: Span end index.
+            
+        Returns:
+            (start, end) with surrounding whitespace excluded.
+        """
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        return start, end
+    
+    @staticmethod
+    def _starts_with_span(text: str, source: str, start: int, end: int) -> bool:
+        """
+        Equivalent to `text.startswith(source[start:end])`, without copying
+        the span in the common case where the first characters differ.
+        
+        Args:
+            text: Text to check.
+            source: Text the candidate prefix comes from.
+            start: Prefix start index in `source`.
+            end: Prefix end index in `source`.
+            
+        Returns:
+            True if `text` already starts with the span.
+        """
+        if start >= end:
+            return True
+        if end - start > len(text) or text[0] != source[start]:
+            return False
+        return text.startswith(source[start:end])
+    
+    def _find_overlap_span(
         self,
         text: str,
         overlap_size: int,
         from_end: bool = True
-    ) -> str:
+    ) -> Tuple[int, int]:
         """
-        Extract overlap content from text.
+        Locate overlap content in text as (start, end) indices.
         
         Tries to break at word boundaries for cleaner overlap.
         
@@ -196,29 +263,49 @@ class OverlapManager:
             from_end: If True, extract from end; otherwise from start.
             
         Returns:
-            Extracted overlap content.
+            (start, end) such that `text[start:end]` is the overlap content.
         """
         if overlap_size <= 0:
-            return ""
+            return 0, 0
         
         if from_end:
             # Extract from end, try to break at word boundary
-            raw_content = text[-overlap_size:]
+            start = max(len(text) - overlap_size, 0)
             
             # Find first space to start at word boundary
-            space_idx = raw_content.find(' ')
-            if space_idx > 0 and space_idx < len(raw_content) // 2:
-                return raw_content[space_idx + 1:]
-            return raw_content
+            space_idx = text.find(' ', start) - start
+            if space_idx > 0 and space_idx < (len(text) - start) // 2:
+                return start + space_idx + 1, len(text)
+            return start, len(text)
         else:
             # Extract from start, try to break at word boundary
-            raw_content = text[:overlap_size]
+            end = min(overlap_size, len(text))
             
             # Find last space to end at word boundary
-            space_idx = raw_content.rfind(' ')
-            if space_idx > len(raw_content) // 2:
-                return raw_content[:space_idx]
-            return raw_content
+            space_idx = text.rfind(' ', 0, end)
+            if space_idx > end // 2:
+                return 0, space_idx
+            return 0, end
+    
+    def _get_overlap_content(
+        self,
+        text: str,
+        overlap_size: int,
+        from_end: bool = True
+    ) -> str:
+        """
+        Extract overlap content from text.
+        
+        Args:
+            text: Source text.
+            overlap_size: Target overlap size in characters.
+            from_end: If True, extract from end; otherwise from start.
+            
+        Returns:
+            Extracted overlap content.
+        """
+        start, end = self._find_overlap_span(text, overlap_size, from_end)
+        return text[start:end]
     
     def _copy_chunk_with_overlap(
         self,
@@ -228,7 +315,9 @@ class OverlapManager:
         new_text: Optional[str] = None
     ) -> Chunk:
         """
-        Create a copy of a chunk with updated overlap metadata.
+        Update a chunk's overlap metadata, copying the chunk only if its text changes.
+        
+        The metadata dict is updated in place and shared with the returned chunk.
         
         Args:
             chunk: Original chunk.
@@ -237,23 +326,19 @@ class OverlapManager:
             new_text: Optional new text content.
             
         Returns:
-            New chunk with updated metadata.
+            The original chunk, or a new chunk carrying `new_text`.
         """
-        new_metadata: ChunkMetadata = {
-            "source": chunk["metadata"]["source"],
-            "page": chunk["metadata"]["page"],
-            "section": chunk["metadata"]["section"],
-            "chunk_index": chunk["metadata"]["chunk_index"],
-            "parent_chunk_id": chunk["metadata"]["parent_chunk_id"],
-            "overlap_with_prev": overlap_prev,
-            "overlap_with_next": overlap_next,
-            "semantic_tags": chunk["metadata"]["semantic_tags"].copy(),
-        }
+        metadata: ChunkMetadata = chunk["metadata"]
+        metadata["overlap_with_prev"] = overlap_prev
+        metadata["overlap_with_next"] = overlap_next
+        
+        if new_text is None or new_text is chunk["text"]:
+            return chunk
         
         return {
             "id": chunk["id"],
-            "text": new_text if new_text is not None else chunk["text"],
-            "metadata": new_metadata,
+            "text": new_text,
+            "metadata": metadata,
         }
     
     def get_overlap_stats(self, chunks: List[Chunk]) -> dict:
@@ -274,8 +359,12 @@ class OverlapManager:
                 "total_overlap_chars": 0,
             }
         
-        total_prev = sum(c["metadata"]["overlap_with_prev"] for c in chunks)
-        total_next = sum(c["metadata"]["overlap_with_next"] for c in chunks)
+        # Single pass over the chunks for both totals
+        total_prev = total_next = 0
+        for c in chunks:
+            metadata = c["metadata"]
+            total_prev += metadata["overlap_with_prev"]
+            total_next += metadata["overlap_with_next"]
         
         return {
             "total_chunks": len(chunks),
@@ -6,11 +6,39 @@ Designed specifically for academic paper structure (Abstract, Methods, Results,
 """
 
 import re
-import uuid
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Iterable, Iterator, List, Optional, Tuple
 
-from . import Chunk, ChunkMetadata, SECTION_PATTERNS
+import numpy as np
+
+from . import Chunk, ChunkMetadata, SECTION_PATTERNS, COMPILED_SECTION_PATTERNS, source_hash
+
+
+def _line_scoped(pattern: str) -> str:
+    # Header patterns are written against a stripped line: drop their own `^`
+    # anchors and keep `\s` from running across newlines.
+    return pattern.replace("^", "").replace(r"\s", r"[^\S\n]")
+
+
+# Named-group alternation of all sections (section = m.lastgroup) for scanning
+# raw text: anchored at each line start, skipping leading whitespace the way
+# `line.strip()` would.
+_SECTION_LINE_PATTERN = re.compile(
+    r"^[^\S\n]*(?:"
+    + "|".join(f"(?P<{section}>{_line_scoped(pattern)})" for section, pattern in SECTION_PATTERNS.items())
+    + ")",
+    re.IGNORECASE | re.MULTILINE
+)
+
+
+# Split hierarchy for _recursive_split, coarsest first
+_SEPARATORS = (
+    '\n\n',  # Double newline (paragraphs)
+    '\n',    # Single newline
+    '. ',    # Sentence boundary
+    ', ',    # Clause boundary
+    ' ',     # Word boundary
+)
 
 
 @dataclass
@@ -22,6 +50,45 @@ class ChunkConfig:
     section_detection: bool = True  # Enable section detection
 
 
+@dataclass
+class ChunkStore:
+    """
+    Struct-of-arrays view of a document's chunks.
+    
+    Holds one list/array per field instead of a Chunk dict (plus metadata
+    dict) per chunk, so large documents cost a few arrays rather than
+    thousands of small dicts, and fields can be filtered vectorized
+    (e.g. `store.sections == "methods"`). Index it to get a Chunk back.
+    """
+    ids: List[str]
+    texts: List[str]
+    sections: np.ndarray  # str per chunk
+    sources: np.ndarray  # str per chunk
+    chunk_index: np.ndarray  # int32
+    overlap_prev: np.ndarray  # int32
+    overlap_next: np.ndarray  # int32
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __getitem__(self, i: int) -> Chunk:
+        """Materialize chunk `i` as a Chunk dict, as SemanticChunker.chunk returns."""
+        metadata: ChunkMetadata = {
+            "source": str(self.sources[i]),
+            "page": 0,
+            "section": str(self.sections[i]),
+            "chunk_index": int(self.chunk_index[i]),
+            "parent_chunk_id": None,
+            "overlap_with_prev": int(self.overlap_prev[i]),
+            "overlap_with_next": int(self.overlap_next[i]),
+            "semantic_tags": [],
+        }
+        return {"id": self.ids[i], "text": self.texts[i], "metadata": metadata}
+    
+    def __iter__(self) -> Iterator[Chunk]:
+        return (self[i] for i in range(len(self)))
+
+
 class SemanticChunker:
     """
     Section-aware chunker for academic papers.
@@ -39,10 +106,8 @@ class SemanticChunker:
             config: Chunking configuration. Uses defaults if not provided.
         """
         self.config = config or ChunkConfig()
-        self._compiled_patterns = {
-            section: re.compile(pattern, re.IGNORECASE | re.MULTILINE)
-            for section, pattern in SECTION_PATTERNS.items()
-        }
+        self._compiled_patterns = COMPILED_SECTION_PATTERNS
+        self._combined = _SECTION_LINE_PATTERN
     
     def chunk(
         self,
@@ -61,8 +126,74 @@ class SemanticChunker:
         Returns:
             List of Chunk objects with metadata.
         """
+        return list(self.iter_chunks(text, source, doc_type))
+    
+    def iter_chunks(
+        self,
+        text: str,
+        source: str = "unknown",
+        doc_type: str = "paper"
+    ) -> Iterator[Chunk]:
+        """
+        Lazily chunk text, yielding each Chunk as soon as it is complete.
+        
+        Sections are split one at a time and overlap only needs the previous
+        chunk, so memory stays at one section's worth of chunks instead of the
+        whole document, and consumers (embedding, indexing) can start early.
+        
+        Args:
+            text: The full text to chunk.
+            source: Source identifier (e.g., filename, URL).
+            doc_type: Document type ("paper" for academic papers).
+            
+        Yields:
+            Chunk objects with metadata, in document order.
+        """
+        # Step 4: Create Chunk objects with metadata
+        yield from self._create_chunks(self._iter_overlapped(text), source)
+    
+    def chunk_store(
+        self,
+        text: str,
+        source: str = "unknown",
+        doc_type: str = "paper"
+    ) -> ChunkStore:
+        """
+        Chunk text into a ChunkStore instead of a list of Chunk dicts.
+        
+        Same chunks as `chunk`, without building per-chunk dicts.
+        
+        Args:
+            text: The full text to chunk.
+            source: Source identifier (e.g., filename, URL).
+            doc_type: Document type ("paper" for academic papers).
+            
+        Returns:
+            ChunkStore with one entry per chunk.
+        """
+        ids, texts, sections, overlap_prev, overlap_next = [], [], [], [], []
+        for i, (tail, chunk_text, section, prev, nxt) in enumerate(self._iter_overlapped(text)):
+            ids.append(self._chunk_id(source, section, i))
+            texts.append("".join((tail, " ", chunk_text)) if tail else chunk_text)
+            sections.append(section)
+            overlap_prev.append(prev)
+            overlap_next.append(nxt)
+        
+        count = len(ids)
+        return ChunkStore(
+            ids=ids,
+            texts=texts,
+            sections=np.array(sections, dtype=str),
+            sources=np.full(count, source),
+            chunk_index=np.arange(count, dtype=np.int32),
+            overlap_prev=np.fromiter(overlap_prev, dtype=np.int32, count=count),
+            overlap_next=np.fromiter(overlap_next, dtype=np.int32, count=count),
+        )
+    
+    def _iter_overlapped(self, text: str) -> Iterator[Tuple[str, str, str, int, int]]:
+        """Steps 1-3 of chunking: (tail, text, section, overlap_prev, overlap_next) per chunk."""
         if not text or not text.strip():
-            return []
+            return
         
         # Step 1: Detect sections
         sections = self.detect_sections(text) if self.config.section_detection else []
@@ -71,15 +202,10 @@ class SemanticChunker:
         if sections:
             raw_chunks = self._recursive_split_with_sections(text, sections)
         else:
-            raw_chunks = self._recursive_split(text, "body")
+            raw_chunks = iter(self._recursive_split(text, "body"))
         
         # Step 3: Apply overlap
-        chunks_with_overlap = self._apply_overlap(raw_chunks)
-        
-        # Step 4: Create Chunk objects with metadata
-        chunks = self._create_chunks(chunks_with_overlap, source)
-        
-        return chunks
+        yield from self._apply_overlap(raw_chunks)
     
     def detect_sections(self, text: str) -> List[Tuple[str, int, int]]:
         """
@@ -91,49 +217,20 @@ class SemanticChunker:
         Returns:
             List of tuples: (section_name, start_index, end_index)
         """
-        sections = []
-        lines = text.split('\n')
-        current_pos = 0
+        # One pass of the C regex engine over the text; each match starts at
+        # the beginning of its header line.
+        starts = [(match.lastgroup, match.start()) for match in self._combined.finditer(text)]
         
-        for i, line in enumerate(lines):
-            stripped = line.strip()
-            for section_name, pattern in self._compiled_patterns.items():
-                if pattern.match(stripped):
-                    sections.append((section_name, current_pos, i))
-                    break
-            current_pos += len(line) + 1  # +1 for newline
-        
-        if not sections:
-            return []
-        
-        # Convert line indices to character positions and set end positions
-        result = []
-        lines_cumulative = []
-        pos = 0
-        for line in lines:
-            lines_cumulative.append(pos)
-            pos += len(line) + 1
-        
-        for i, (section_name, _, line_idx) in enumerate(sections):
-            start_pos = lines_cumulative[line_idx] if line_idx < len(lines_cumulative) else 0
-            
-            # End position is start of next section or end of text
-            if i + 1 < len(sections):
-                next_line_idx = sections[i + 1][2]
-                end_pos = lines_cumulative[next_line_idx] if next_line_idx < len(lines_cumulative) else len(text)
-            else:
-                end_pos = len(text)
-            
-            result.append((section_name, start_pos, end_pos))
-        
-        return result
+        # End position is start of next section or end of text
+        ends = [start for _, start in starts[1:]] + [len(text)]
+        return [(section_name, start, end) for (section_name, start), end in zip(starts, ends)]
 
     
     def _recursive_split_with_sections(
         self,
         text: str,
         sections: List[Tuple[str, int, int]]
-    ) -> List[Tuple[str, str]]:
+    ) -> Iterator[Tuple[str, str]]:
         """
         Split text recursively while respecting section boundaries.
         
@@ -141,25 +238,20 @@ class SemanticChunker:
             text: The full text.
             sections: List of (section_name, start, end) tuples.
             
-        Returns:
-            List of (chunk_text, section_name) tuples.
+        Yields:
+            (chunk_text, section_name) tuples, one section at a time.
         """
-        chunks = []
-        
         # Handle text before first section
         if sections and sections[0][1] > 0:
             pre_section_text = text[:sections[0][1]].strip()
             if pre_section_text:
-                chunks.extend(self._recursive_split(pre_section_text, "preamble"))
+                yield from self._recursive_split(pre_section_text, "preamble")
         
         # Process each section
         for section_name, start, end in sections:
             section_text = text[start:end].strip()
             if section_text:
-                section_chunks = self._recursive_split(section_text, section_name)
-                chunks.extend(section_chunks)
-        
-        return chunks
+                yield from self._recursive_split(section_text, section_name)
     
     def _recursive_split(
         self,
@@ -170,6 +262,11 @@ class SemanticChunker:
         Recursively split text into chunks of target size.
         
         Uses a hierarchy of separators: paragraphs -> sentences -> words.
+        Oversized parts are handled depth-first on an explicit work stack
+        rather than by recursion, so giant sections cannot hit the recursion
+        limit and separators already known to be absent are never re-scanned.
+        Merging works on part lengths and offsets; each emitted chunk is one
+        slice of its span instead of a string rebuilt part by part.
         
         Args:
             text: Text to split.
@@ -178,72 +275,90 @@ class SemanticChunker:
         Returns:
             List of (chunk_text, section_name) tuples.
         """
-        if len(text) <= self.config.chunk_size:
-            return [(text, section)] if text.strip() else []
-        
-        # Try splitting by paragraphs first
-        separators = [
-            '\n\n',  # Double newline (paragraphs)
-            '\n',    # Single newline
-            '. ',    # Sentence boundary
-            ', ',    # Clause boundary
-            ' ',     # Word boundary
-        ]
-        
-        for separator in separators:
-            parts = text.split(separator)
-            if len(parts) > 1:
-                chunks = self._merge_splits(parts, separator, section)
-                if chunks:
-                    return chunks
+        chunk_size = self.config.chunk_size
+        min_chunk_size = self.config.min_chunk_size
         
-        # Fallback: hard split at chunk_size
-        return self._hard_split(text, section)
-    
-    def _merge_splits(
-        self,
-        parts: List[str],
-        separator: str,
-        section: str
-    ) -> List[Tuple[str, str]]:
-        """
-        Merge split parts back together to reach target chunk size.
+        if len(text) <= chunk_size:
+            return [(text, section)] if text.strip() else []
         
-        Args:
-            parts: List of text parts.
-            separator: The separator used to split.
-            section: Section name.
+        chunks: List[Tuple[str, str]] = []
+        # Frame: [text, sep_idx, first_present, parts, pos, part_start,
+        #         cur_start, cur_end, out_start]
+        # text[cur_start:cur_end] is the chunk being merged and part_start the
+        # offset of parts[pos]. `first_present` is the first separator found in
+        # the text; its parts cannot contain any earlier one, so their own
+        # search starts there.
+        stack = [[text, 0, None, None, 0, 0, 0, 0, 0]]
+        
+        while stack:
+            frame = stack[-1]
+            frame_text, sep_idx, first_present, parts, pos, part_start, cur_start, cur_end, out_start = frame
             
-        Returns:
-            List of (chunk_text, section_name) tuples.
-        """
-        chunks = []
-        current_chunk = ""
-        
-        for part in parts:
-            test_chunk = current_chunk + separator + part if current_chunk else part
+            if parts is None:
+                while sep_idx < len(_SEPARATORS) and _SEPARATORS[sep_idx] not in frame_text:
+                    sep_idx += 1
+                if sep_idx == len(_SEPARATORS):
+                    # Fallback: hard split at chunk_size
+                    chunks.extend(self._hard_split(frame_text, section))
+                    stack.pop()
+                    continue
+                if first_present is None:
+                    first_present = sep_idx
+                parts = frame_text.split(_SEPARATORS[sep_idx])
+                pos, part_start, cur_start, cur_end, out_start = 0, 0, 0, 0, len(chunks)
             
-            if len(test_chunk) <= self.config.chunk_size:
-                current_chunk = test_chunk
-            else:
-                if current_chunk and len(current_chunk) >= self.config.min_chunk_size:
-                    chunks.append((current_chunk.strip(), section))
+            sep_len = len(_SEPARATORS[sep_idx])
+            child = None
+            
+            # Merge split parts back together to reach target chunk size
+            for pos in range(pos, len(parts)):
+                part_begin = part_start
+                part_end = part_begin + len(parts[pos])
+                part_start = part_end + sep_len
                 
-                # If part itself is too large, recursively split it
-                if len(part) > self.config.chunk_size:
-                    sub_chunks = self._recursive_split(part, section)
-                    chunks.extend(sub_chunks)
-                    current_chunk = ""
-                else:
-                    current_chunk = part
-        
-        # Don't forget the last chunk
-        if current_chunk and len(current_chunk.strip()) >= self.config.min_chunk_size:
-            chunks.append((current_chunk.strip(), section))
-        elif current_chunk and chunks:
-            # Append small remainder to previous chunk if possible
-            prev_text, prev_section = chunks[-1]
-            chunks[-1] = (prev_text + separator + current_chunk.strip(), prev_section)
+                # current + separator + part is contiguous in frame_text
+                if cur_end > cur_start:
+                    if part_end - cur_start <= chunk_size:
+                        cur_end = part_end
+                        continue
+                elif part_end - part_begin <= chunk_size:
+                    cur_start, cur_end = part_begin, part_end
+                    continue
+                
+                if cur_end - cur_start >= max(min_chunk_size, 1):
+                    chunks.append((frame_text[cur_start:cur_end].strip(), section))
+                
+                # If part itself is too large, split it before continuing here
+                if part_end - part_begin > chunk_size:
+                    cur_start = cur_end = part_begin
+                    child_start = first_present if first_present < sep_idx else sep_idx + 1
+                    child = [parts[pos], child_start, None, None, 0, 0, 0, 0, 0]
+                    pos += 1
+                    break
+                cur_start, cur_end = part_begin, part_end
+            else:
+                pos = len(parts)
+            
+            frame[1:] = [sep_idx, first_present, parts, pos, part_start, cur_start, cur_end, out_start]
+            if child is not None:
+                stack.append(child)
+                continue
+            
+            # Don't forget the last chunk
+            if cur_end > cur_start:
+                current_chunk = frame_text[cur_start:cur_end].strip()
+                if len(current_chunk) >= min_chunk_size:
+                    chunks.append((current_chunk, section))
+                elif len(chunks) > out_start:
+                    # Append small remainder to previous chunk if possible
+                    prev_text, prev_section = chunks[-1]
+                    chunks[-1] = (prev_text + _SEPARATORS[sep_idx] + current_chunk, prev_section)
+            
+            if len(chunks) == out_start:
+                # Nothing survived this separator; try the next one
+                frame[1:4] = [sep_idx + 1, first_present, None]
+                continue
+            stack.pop()
         
         return chunks
     
@@ -272,66 +387,67 @@ class SemanticChunker:
     
     def _apply_overlap(
         self,
-        chunks: List[Tuple[str, str]]
-    ) -> List[Tuple[str, str, int, int]]:
+        chunks: Iterable[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, str, str, int, int]]:
         """
         Apply overlap between consecutive chunks.
         
+        Each chunk is yielded once the next one arrives (or the input ends),
+        since overlap_next depends on whether it is the last. The overlap is
+        returned as a separate tail rather than prepended here, so the final
+        text is built with a single join where the chunk is created.
+        
         Args:
-            chunks: List of (chunk_text, section_name) tuples.
+            chunks: Iterable of (chunk_text, section_name) tuples.
             
-        Returns:
-            List of (chunk_text, section_name, overlap_prev, overlap_next) tuples.
+        Yields:
+            (overlap_tail, chunk_text, section_name, overlap_prev, overlap_next)
+            tuples; overlap_tail is "" when nothing is prepended.
         """
-        if not chunks:
-            return []
-        
         overlap_chars = int(self.config.chunk_size * self.config.overlap_percent / 100)
-        result = []
+        prev_text = None
+        pending = None
         
-        for i, (text, section) in enumerate(chunks):
-            overlap_prev = 0
-            overlap_next = 0
-            new_text = text
+        for text, section in chunks:
+            # Overlap with next (for metadata, actual overlap added in this iteration)
+            if pending is not None:
+                yield (*pending, min(len(prev_text), overlap_chars))
+            
+            tail = ""
             
             # Add overlap from previous chunk (append to beginning)
-            if i > 0:
-                prev_text = chunks[i - 1][0]
-                overlap_content = prev_text[-overlap_chars:] if len(prev_text) > overlap_chars else prev_text
+            if prev_text is not None and overlap_chars > 0:
+                overlap_content = prev_text[-overlap_chars:]
                 # Only add if it doesn't duplicate
-                if not new_text.startswith(overlap_content):
-                    new_text = overlap_content + " " + new_text
-                    overlap_prev = len(overlap_content)
+                if not text.startswith(overlap_content):
+                    tail = overlap_content
             
-            # Calculate overlap with next (for metadata, actual overlap added in next iteration)
-            if i < len(chunks) - 1:
-                next_text = chunks[i + 1][0]
-                overlap_content = text[-overlap_chars:] if len(text) > overlap_chars else text
-                overlap_next = len(overlap_content)
-            
-            result.append((new_text, section, overlap_prev, overlap_next))
+            pending = (tail, text, section, len(tail))
+            prev_text = text
         
-        return result
+        if pending is not None:
+            yield (*pending, 0)
     
     def _create_chunks(
         self,
-        chunks_data: List[Tuple[str, str, int, int]],
+        chunks_data: Iterable[Tuple[str, str, str, int, int]],
         source: str
-    ) -> List[Chunk]:
+    ) -> Iterator[Chunk]:
         """
         Create Chunk objects with full metadata.
         
         Args:
-            chunks_data: List of (text, section, overlap_prev, overlap_next) tuples.
+            chunks_data: Iterable of (overlap_tail, text, section, overlap_prev,
+                overlap_next) tuples, as yielded by `_apply_overlap`.
             source: Source identifier.
             
-        Returns:
-            List of Chunk objects.
+        Yields:
+            Chunk objects.
         """
-        chunks = []
-        
-        for i, (text, section, overlap_prev, overlap_next) in enumerate(chunks_data):
-            chunk_id = f"{source}_{section}_{i}_{uuid.uuid4().hex[:8]}"
+        for i, (tail, body, section, overlap_prev, overlap_next) in enumerate(chunks_data):
+            chunk_id = self._chunk_id(source, section, i)
+            # One join builds the overlapped text; chunks without overlap are used as-is
+            text = "".join((tail, " ", body)) if tail else body
             
             metadata: ChunkMetadata = {
                 "source": source,
@@ -350,9 +466,13 @@ class SemanticChunker:
                 "metadata": metadata,
             }
             
-            chunks.append(chunk)
-        
-        return chunks
+            yield chunk
+    
+    @staticmethod
+    def _chunk_id(source: str, section: str, index: int) -> str:
+        # Deterministic: the same document chunks to the same IDs on every run,
+        # and no random bytes are drawn per chunk
+        return f"{source_hash(source)}_{section}_{index}"
     
     @staticmethod
     def from_config_dict(config_dict: dict) -> "SemanticChunker":
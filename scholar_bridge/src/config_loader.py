@@ -0,0 +1,22 @@
+import functools
+import os
+import yaml
+
+# Runtime data (Chroma store, caches, downloads) lives in <package>/data, whatever the
+# working directory: main.py and server.py are started from different places.
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# libyaml's C parser is much faster; fall back to the pure-Python one if absent
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+@functools.lru_cache(maxsize=None)
+def load(path: str) -> dict:
+    """
+    Parses a YAML config file once per process.
+    The returned dict is shared between callers, so treat it as read-only.
+    """
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=SafeLoader)
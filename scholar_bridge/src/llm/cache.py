@@ -0,0 +1,127 @@
+import hashlib
+import os
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..config_loader import DATA_DIR
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+CACHE_DIR = os.path.join(DATA_DIR, "cache", "prompts")
+
+# text-embedding-004 accepts ~2k tokens. Longer prompts are never embedded
+# (a truncated head would make prompts sharing it look identical), so they
+# only get exact hits.
+MAX_EMBED_CHARS = 8000
+
+
+class PromptCache:
+    """
+    Exact + optional semantic cache for LLM responses (GPTCache-style).
+    
+    Exact hits are a sha256 lookup. With `semantic` on, a miss embeds the
+    prompt and compares it by cosine similarity against recent entries that
+    share the same model, system instruction and generation config; a close
+    enough match returns its cached response. Semantic matching costs an
+    embedding call per miss and can return another prompt's answer, so it is
+    off by default.
+    """
+    
+    def __init__(
+        self,
+        embed_fn: Callable[[str], List[float]],
+        similarity_threshold: float = 0.97,
+        max_recent: int = 256,
+        directory: str = CACHE_DIR,
+        semantic: bool = False
+    ):
+        if diskcache is None:
+            raise ImportError("diskcache is required. Install with: pip install diskcache")
+        
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.max_recent = max_recent
+        self.semantic = semantic
+        self.disk = diskcache.Cache(directory)
+    
+    @staticmethod
+    def _namespace(
+        model: str,
+        system_instruction: Optional[str],
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> str:
+        raw = f"{model}\x00{system_instruction or ''}"
+        if generation_config:
+            raw += f"\x00{sorted(generation_config.items())!r}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+    
+    @staticmethod
+    def _key(namespace: str, prompt: str) -> str:
+        return hashlib.sha256(f"{namespace}\x00{prompt}".encode()).hexdigest()
+    
+    def _embed(self, prompt: str) -> np.ndarray:
+        vec = np.asarray(self.embed_fn(prompt), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+    
+    def lookup(
+        self,
+        model: str,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        Returns (cached_response, prompt_embedding). The embedding is only computed
+        on an exact miss with semantic matching on, and should be passed back to
+        `store` to avoid recomputing it.
+        """
+        namespace = self._namespace(model, system_instruction, generation_config)
+        
+        response = self.disk.get(self._key(namespace, prompt))
+        if response is not None:
+            return response, None
+        
+        if not self.semantic or len(prompt) > MAX_EMBED_CHARS:
+            return None, None
+        
+        recent: List[Tuple[np.ndarray, str]] = self.disk.get(f"recent:{namespace}", [])
+        try:
+            embedding = self._embed(prompt)
+        except Exception as e:
+            print(f"Prompt cache embedding failed: {e}")
+            return None, None
+        
+        if recent:
+            matrix = np.stack([vec for vec, _ in recent])
+            sims = matrix @ embedding
+            best = int(np.argmax(sims))
+            if sims[best] >= self.similarity_threshold:
+                return recent[best][1], embedding
+        
+        return None, embedding
+    
+    def store(
+        self,
+        model: str,
+        prompt: str,
+        response: str,
+        system_instruction: Optional[str] = None,
+        embedding: Optional[np.ndarray] = None,
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """Stores a response under its exact key and in the semantic lookup window."""
+        namespace = self._namespace(model, system_instruction, generation_config)
+        self.disk.set(self._key(namespace, prompt), response)
+        
+        if embedding is None:
+            return
+        recent_key = f"recent:{namespace}"
+        with self.disk.transact():
+            recent = self.disk.get(recent_key, [])
+            recent.append((embedding, response))
+            self.disk.set(recent_key, recent[-self.max_recent:])
@@ -1,20 +1,54 @@
+import asyncio
+import functools
+import hashlib
+from collections import OrderedDict
 import google.generativeai as genai
+from google.api_core import retry_async
 import os
-from typing import Dict, Any, Optional
-import yaml
+from typing import AsyncIterator, Dict, Any, List, Optional
+from ..config_loader import load
+from .cache import PromptCache
+
+# Request options per service tier. These are client-side settings only (the
+# google-generativeai SDK does not expose Gemini's Flex service tier, and nothing
+# here is billed differently): "patient" is what a latency-tolerant caller
+# wants, a long deadline and backoff on quota errors.
+SERVICE_TIER_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "standard": {},
+    "patient": {
+        "timeout": 600,
+        "retry": retry_async.AsyncRetry(initial=2.0, multiplier=2.0, maximum=60.0, timeout=600.0),
+    },
+}
+
+# Default cap on in-flight requests for generate_many
+MAX_CONCURRENT_REQUESTS = 8
+
+# In-memory response entries kept per client (LRU)
+RESPONSE_CACHE_SIZE = 1024
+
+@functools.lru_cache(maxsize=None)
+def _configure_genai(api_key: str) -> None:
+    """
+    Configures the SDK once per process. genai.configure() drops the SDK's
+    cached service clients, so calling it per GeminiClient would give each
+    instance its own gRPC channel (and TLS handshake). Configured once, every
+    model shares one channel per client type. The default transport is kept:
+    gRPC for sync calls and grpc_asyncio for the async ones `generate` uses.
+    """
+    genai.configure(api_key=api_key)
 
 class GeminiClient:
     def __init__(self, config_path: str = "scholar_bridge/config/model_config.yaml"):
-        # Load Config
-        with open(config_path, "r") as f:
-            self.config = yaml.safe_load(f)["model_settings"]
+        # Load Config (parsed once per process and shared)
+        self.config = load(config_path)["model_settings"]
         
         # Setup API Key
         api_key = os.getenv(self.config["api_key_env_var"])
         if not api_key:
             raise ValueError(f"API Key not found in env var: {self.config['api_key_env_var']}")
         
-        genai.configure(api_key=api_key)
+        _configure_genai(api_key)
         
         # Setup Model
         self.model = genai.GenerativeModel(
@@ -24,10 +58,69 @@ class GeminiClient:
                 max_output_tokens=self.config["max_output_tokens"]
             )
         )
+        
+        # In-process memo of exact repeats (reranking / re-evaluation loops);
+        # checked before the optional persistent cache below
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self._cache_size = self.config.get("response_cache_size", RESPONSE_CACHE_SIZE)
+        
+        # Optional exact + semantic response cache
+        self.cache = None
+        if self.config.get("prompt_cache", False):
+            try:
+                self.cache = PromptCache(
+                    embed_fn=self._embed_prompt,
+                    similarity_threshold=self.config.get("prompt_cache_similarity", 0.97),
+                    semantic=self.config.get("prompt_cache_semantic", False)
+                )
+            except ImportError as e:
+                print(f"Prompt cache disabled: {e}")
+
+    def _embed_prompt(self, text: str) -> list:
+        result = genai.embed_content(
+            model="models/text-embedding-004",
+            content=text,
+            task_type="semantic_similarity"
+        )
+        return result['embedding']
+
+    @staticmethod
+    def _cache_key(
+        prompt: str,
+        system_instruction: Optional[str],
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> bytes:
+        raw = f"{system_instruction or ''}\x00{prompt}"
+        if generation_config:
+            raw += f"\x00{sorted(generation_config.items())!r}"
+        return hashlib.blake2b(raw.encode(), digest_size=16).digest()
 
-    async def generate(self, prompt: str, system_instruction: Optional[str] = None) -> str:
+    def _cache_get(self, key: bytes) -> Optional[str]:
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+        return text
+
+    def _cache_put(self, key: bytes, text: str) -> None:
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    async def generate(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        service_tier: str = "standard",
+        generation_config: Optional[Dict[str, Any]] = None
+    ) -> str:
         """
         Generates content using the Gemini model.
+        
+        service_tier: "standard" for user-facing output, "patient" for background
+        work (e.g. paper filtering) that can tolerate slower, retried requests.
+        generation_config: per-call overrides merged over the model defaults,
+        e.g. response_mime_type/response_schema for structured JSON output.
         """
         # Note: In the python SDK, system_instruction is often set at model init or 
         # prepended. For simplicity with the standard SDK, we'll prepend if needed 
@@ -37,9 +130,103 @@ class GeminiClient:
         if system_instruction:
             full_prompt = f"System Instruction: {system_instruction}\n\nUser Request: {prompt}"
             
+        key = self._cache_key(prompt, system_instruction, generation_config)
+        memo = self._cache_get(key)
+        if memo is not None:
+            return memo
+            
+        # Cache lookups may embed the prompt (a blocking call); keep them off the loop
+        embedding = None
+        if self.cache is not None:
+            cached, embedding = await asyncio.to_thread(
+                self.cache.lookup, self.config["model_name"], prompt, system_instruction, generation_config
+            )
+            if cached is not None:
+                self._cache_put(key, cached)
+                return cached
+            
         try:
-            response = self.model.generate_content(full_prompt)
-            return response.text
+            response = await self.model.generate_content_async(
+                full_prompt,
+                generation_config=generation_config,
+                request_options=SERVICE_TIER_OPTIONS.get(service_tier, {})
+            )
+            text = response.text
+            if text:
+                self._cache_put(key, text)
+                if self.cache is not None:
+                    await asyncio.to_thread(
+                        self.cache.store, self.config["model_name"], prompt, text,
+                        system_instruction, embedding, generation_config
+                    )
+            return text
         except Exception as e:
             print(f"Error generating content: {e}")
             return ""
+
+    async def generate_stream(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Streams generated content from the Gemini model, yielding text chunks as
+        they arrive. The full response is cached like `generate` does.
+        """
+        full_prompt = prompt
+        if system_instruction:
+            full_prompt = f"System Instruction: {system_instruction}\n\nUser Request: {prompt}"
+            
+        key = self._cache_key(prompt, system_instruction)
+        memo = self._cache_get(key)
+        if memo is not None:
+            yield memo
+            return
+            
+        embedding = None
+        if self.cache is not None:
+            cached, embedding = await asyncio.to_thread(
+                self.cache.lookup, self.config["model_name"], prompt, system_instruction
+            )
+            if cached is not None:
+                self._cache_put(key, cached)
+                yield cached
+                return
+            
+        parts = []
+        try:
+            response = await self.model.generate_content_async(full_prompt, stream=True)
+            async for chunk in response:
+                if chunk.text:
+                    parts.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            print(f"Error streaming content: {e}")
+            return
+        
+        if parts:
+            text = "".join(parts)
+            self._cache_put(key, text)
+            if self.cache is not None:
+                await asyncio.to_thread(
+                    self.cache.store, self.config["model_name"], prompt, text, system_instruction, embedding
+                )
+
+    async def generate_many(
+        self,
+        prompts: List[str],
+        system_instruction: Optional[str] = None,
+        service_tier: str = "standard",
+        max_concurrency: int = MAX_CONCURRENT_REQUESTS
+    ) -> List[str]:
+        """
+        Runs `generate` for each prompt concurrently, at most `max_concurrency`
+        requests in flight to respect rate limits. Results keep prompt order.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _run(prompt: str) -> str:
+            async with semaphore:
+                return await self.generate(prompt, system_instruction, service_tier)
+        
+        return await asyncio.gather(*(_run(p) for p in prompts))
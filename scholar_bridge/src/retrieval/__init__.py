@@ -10,11 +10,14 @@ Components:
 - Reranker: LLM-based relevance reranking and diversity filtering
 """
 
-from typing import TypedDict, List, Optional
+from typing import List, Optional
 from dataclasses import dataclass
 
+import numpy as np
 
-class RetrievalResult(TypedDict):
+
+@dataclass(slots=True)
+class RetrievalResult:
     """A single retrieval result with score."""
     chunk_id: str
     text: str
@@ -22,6 +25,63 @@ class RetrievalResult(TypedDict):
     source: str  # "bm25", "vector", or "hybrid"
     metadata: dict
 
+    def copy(self) -> "RetrievalResult":
+        """Shallow copy (metadata is shared, as with dict.copy)."""
+        return RetrievalResult(self.chunk_id, self.text, self.score, self.source, self.metadata)
+
+
+# Source labels by RetrievalBatch.sources code
+RESULT_SOURCES = ("bm25", "vector", "hybrid")
+
+
+@dataclass
+class RetrievalBatch:
+    """
+    Ranked results as parallel arrays (structure of arrays).
+
+    Lets fusion work on whole columns with NumPy instead of walking lists of
+    RetrievalResult. sources holds indices into RESULT_SOURCES.
+    """
+    ids: np.ndarray  # object array of chunk ids
+    texts: List[str]
+    scores: np.ndarray  # float64
+    sources: np.ndarray  # uint8
+    metadata: List[dict]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    @classmethod
+    def from_results(cls, results: List[RetrievalResult]) -> "RetrievalBatch":
+        """Columns of a list of results, in order."""
+        n = len(results)
+        ids = np.empty(n, dtype=object)
+        ids[:] = [r.chunk_id for r in results]
+        return cls(
+            ids=ids,
+            texts=[r.text for r in results],
+            scores=np.fromiter((r.score for r in results), dtype=np.float64, count=n),
+            sources=np.fromiter(
+                (RESULT_SOURCES.index(r.source) for r in results), dtype=np.uint8, count=n
+            ),
+            metadata=[r.metadata for r in results],
+        )
+
+    def to_results(self) -> List[RetrievalResult]:
+        """Rows as RetrievalResult, in order."""
+        return [
+            RetrievalResult(
+                chunk_id=chunk_id,
+                text=text,
+                score=score,
+                source=RESULT_SOURCES[source],
+                metadata=metadata,
+            )
+            for chunk_id, text, score, source, metadata in zip(
+                self.ids.tolist(), self.texts, self.scores.tolist(), self.sources.tolist(), self.metadata
+            )
+        ]
+
 
 @dataclass
 class RetrievalConfig:
@@ -39,12 +99,16 @@ class RerankConfig:
     """Configuration for reranking."""
     enabled: bool = True
     diversity_threshold: float = 0.7
+    diversity_minhash: bool = False  # Approximate Jaccard with MinHash signatures (large result sets)
     relevance_threshold: float = 0.5
     max_context_tokens: int = 4000
+    max_concurrency: int = 8  # Max concurrent LLM relevance-scoring calls
 
 
 __all__ = [
     "RetrievalResult",
+    "RetrievalBatch",
+    "RESULT_SOURCES",
     "RetrievalConfig",
     "RerankConfig",
     "BM25Index",
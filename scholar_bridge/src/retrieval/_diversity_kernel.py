@@ -0,0 +1,70 @@
+"""
+Diversity selection kernel for Reranker.
+
+Greedy Jaccard filtering over word sets encoded as sorted integer arrays,
+packed end to end (flat values plus offsets). Each pair is a two-pointer
+merge, skipped when the size bound min/max already clears the threshold,
+and the whole selection runs in one compiled call, so there is no per-pair
+dispatch. Only built when Numba is installed, and only used for result
+lists long enough to amortize the compile; otherwise the reranker keeps
+its frozenset path, which beats NumPy set routines at these sizes.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _select_diverse_loop(flat, offsets, threshold):
+    n = offsets.shape[0] - 1
+    selected = np.empty(n, dtype=np.int64)
+    if n == 0:
+        return selected
+    selected[0] = 0
+    n_selected = 1
+    for row in range(1, n):
+        a_start = offsets[row]
+        a_end = offsets[row + 1]
+        len_a = a_end - a_start
+        is_diverse = True
+        for s in range(n_selected):
+            b_start = offsets[selected[s]]
+            b_end = offsets[selected[s] + 1]
+            len_b = b_end - b_start
+            # Jaccard <= min(|A|, |B|) / max(|A|, |B|)
+            longer = max(len_a, len_b)
+            if longer > 0 and min(len_a, len_b) / longer <= threshold:
+                continue
+            similarity = 0.0
+            if len_a > 0 and len_b > 0:
+                i = a_start
+                j = b_start
+                intersection = 0
+                while i < a_end and j < b_end:
+                    if flat[i] == flat[j]:
+                        intersection += 1
+                        i += 1
+                        j += 1
+                    elif flat[i] < flat[j]:
+                        i += 1
+                    else:
+                        j += 1
+                similarity = intersection / (len_a + len_b - intersection)
+            if similarity > threshold:
+                is_diverse = False
+                break
+        if is_diverse:
+            selected[n_selected] = row
+            n_selected += 1
+    return selected[:n_selected]
+
+
+# Not cached on disk: cache files are keyed by module name, which differs
+# between the main.py and server.py import paths.
+if njit is not None:
+    select_diverse = njit(_select_diverse_loop)
+else:
+    select_diverse = None
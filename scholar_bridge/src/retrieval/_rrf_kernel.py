@@ -0,0 +1,46 @@
+"""
+Reciprocal Rank Fusion kernel for HybridRetriever.
+
+Accumulates RRF scores for two ranked lists of integer-coded chunk ids in
+one call, given each list's per-rank weights (weight / (k + rank)). Compiled
+with Numba when it is installed; otherwise the same sums run as NumPy
+scatter-adds.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def rank_weights(weight, k, n):
+    """weight / (k + rank) for ranks 1..n, as float64."""
+    return weight / (k + np.arange(1, n + 1))
+
+
+def _rrf_scores_numpy(codes_a, codes_b, n_ids, weights_a, weights_b):
+    scores = np.zeros(n_ids, dtype=np.float64)
+    # List a is added before list b, as the scalar loop does, so sums are identical
+    np.add.at(scores, codes_a, weights_a[:codes_a.shape[0]])
+    np.add.at(scores, codes_b, weights_b[:codes_b.shape[0]])
+    return scores
+
+
+def _rrf_scores_loop(codes_a, codes_b, n_ids, weights_a, weights_b):
+    scores = np.zeros(n_ids, dtype=np.float64)
+    for rank in range(codes_a.shape[0]):
+        scores[codes_a[rank]] += weights_a[rank]
+    for rank in range(codes_b.shape[0]):
+        scores[codes_b[rank]] += weights_b[rank]
+    return scores
+
+
+# The compiled loop skips the temporaries the NumPy scatter-adds build.
+# Not cached on disk: cache files are keyed by module name, which differs
+# between the main.py and server.py import paths.
+if njit is not None:
+    rrf_scores = njit(_rrf_scores_loop)
+else:
+    rrf_scores = _rrf_scores_numpy
@@ -4,23 +4,87 @@ BM25 Index for keyword-based search.
 Provides BM25 ranking algorithm for keyword search alongside vector similarity.
 """
 
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 from typing import List, Optional, Tuple, Dict, Any
+import math
+import os
+import pickle
 import re
+import sys
+import uuid
 
-try:
-    from rank_bm25 import BM25Okapi
-except ImportError:
-    BM25Okapi = None
+import numpy as np
 
 from . import RetrievalResult
 
 
+# Keep alphanumeric, hyphens, and underscores
+# Split on whitespace and punctuation (except hyphens in words)
+# Same tokens as r'\b[\w-]+\b' minus single characters, but without the
+# boundary assertions, so the regex engine does the length filtering too.
+_TOKEN_RE = re.compile(r'\w[\w-]*\w')
+
+# Common stopwords for academic text
+_STOPWORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
+    'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are',
+    'were', 'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did',
+    'will', 'would', 'could', 'should', 'may', 'might', 'must',
+    'this', 'that', 'these', 'those', 'it', 'its', 'we', 'our',
+    'they', 'their', 'which', 'who', 'whom', 'what', 'where', 'when',
+})
+
+# Files written by BM25Index.save
+_META_FILE = "meta.pkl"
+_DOC_LENS_FILE = "doc_lens.npy"
+_OFFSETS_FILE = "posting_offsets.npy"
+_DOCS_FILE = "posting_docs.npy"
+_WEIGHTS_FILE = "posting_weights.npy"
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tokenize text for BM25 indexing.
+    
+    Args:
+        text: Text to tokenize.
+        
+    Returns:
+        List of tokens.
+    """
+    # Lowercase, then drop pure numbers and stopwords in one pass
+    # (_TOKEN_RE never yields tokens shorter than 2 characters)
+    return [
+        t for t in _TOKEN_RE.findall(text.lower())
+        if t not in _STOPWORDS and not t.isdigit()
+    ]
+
+
+def _tokenize_corpus(texts: List[str]) -> List[Tuple[str, ...]]:
+    """
+    Tokenize many texts, tokenizing each distinct text once, so repeated
+    boilerplate costs a dict lookup.
+    """
+    tokenized: List[Tuple[str, ...]] = [()] * len(texts)
+    positions: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if text:
+            positions.setdefault(text, []).append(i)
+    
+    for text, indices in positions.items():
+        tokens = tuple(tokenize(text))
+        for i in indices:
+            tokenized[i] = tokens
+    
+    return tokenized
+
+
 @dataclass
 class BM25Config:
     """Configuration for BM25 index."""
     k1: float = 1.5  # Term frequency saturation
     b: float = 0.75  # Length normalization
+    epsilon: float = 0.25  # IDF floor for very common terms, as a fraction of mean IDF
 
 
 class BM25Index:
@@ -29,6 +93,10 @@ class BM25Index:
     
     Uses the BM25Okapi algorithm for ranking documents by keyword relevance.
     Designed to work alongside vector search for hybrid retrieval.
+    
+    Scores match rank_bm25's BM25Okapi, but are computed from NumPy postings:
+    each term's per-document BM25 weights are precomputed at build time, so a
+    query only sums one array slice per query term.
     """
     
     def __init__(self, config: Optional[BM25Config] = None):
@@ -38,13 +106,16 @@ class BM25Index:
         Args:
             config: BM25 configuration. Uses defaults if not provided.
         """
-        if BM25Okapi is None:
-            raise ImportError("rank_bm25 is required. Install with: pip install rank-bm25")
-        
         self.config = config or BM25Config()
-        self._index: Optional[BM25Okapi] = None
         self._chunks: List[Dict[str, Any]] = []
-        self._tokenized_corpus: List[List[str]] = []
+        # Interned chunk ids, so fusion and stats compare them by identity
+        self._chunk_ids: List[str] = []
+        self._doc_lens: np.ndarray = np.zeros(0, dtype=np.int64)
+        # term -> id, and per term id: (doc indices, BM25 weight in each doc)
+        self._vocab: Dict[str, int] = {}
+        self._postings: List[Tuple[np.ndarray, np.ndarray]] = []
+        # Fresh on every build or load, so callers can key cached searches on it
+        self.token = uuid.uuid4().hex
     
     def build_index(self, chunks: List[Dict[str, Any]]) -> None:
         """
@@ -53,21 +124,132 @@ class BM25Index:
         Args:
             chunks: List of chunk dictionaries with 'id', 'text', and 'metadata'.
         """
+        self.token = uuid.uuid4().hex
+        self._chunks = chunks
+        self._chunk_ids = [sys.intern(chunk["id"]) for chunk in chunks]
+        self._vocab = {}
+        self._postings = []
+        self._doc_lens = np.zeros(0, dtype=np.int64)
         if not chunks:
-            self._index = None
-            self._chunks = []
             return
         
-        self._chunks = chunks
-        self._tokenized_corpus = [
-            self._tokenize(chunk["text"]) for chunk in chunks
-        ]
+        corpus_tokens = _tokenize_corpus([chunk["text"] for chunk in chunks])
+        doc_lens = np.fromiter(map(len, corpus_tokens), dtype=np.int64, count=len(chunks))
+        self._doc_lens = doc_lens
+        if not doc_lens.any():
+            return
         
-        self._index = BM25Okapi(
-            self._tokenized_corpus,
-            k1=self.config.k1,
-            b=self.config.b
+        # Term ids in first-occurrence order, for every token of the corpus
+        vocab = self._vocab
+        term_ids = np.fromiter(
+            (vocab.setdefault(term, len(vocab)) for tokens in corpus_tokens for term in tokens),
+            dtype=np.int64,
+            count=int(doc_lens.sum())
         )
+        doc_ids = np.repeat(np.arange(len(chunks), dtype=np.int64), doc_lens)
+        
+        # Postings sorted by (term, doc): unique (term, doc) pairs and their tf
+        pairs, tf = np.unique(term_ids * len(chunks) + doc_ids, return_counts=True)
+        posting_terms, docs = np.divmod(pairs, len(chunks))
+        doc_freqs = np.bincount(posting_terms, minlength=len(vocab))
+        
+        idf = np.array(self._calc_idf(doc_freqs.tolist(), len(chunks)))
+        
+        # Precompute each posting's contribution to the score (BM25Okapi formula)
+        k1, b = self.config.k1, self.config.b
+        avgdl = doc_lens.sum() / len(chunks)
+        tf = tf.astype(np.float64)
+        weights = idf[posting_terms] * (tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_lens[docs] / avgdl)))
+        
+        bounds = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freqs, out=bounds[1:])
+        self._postings = [
+            (docs[start:end], weights[start:end])
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+        ]
+    
+    def _calc_idf(self, doc_freqs: List[int], corpus_size: int) -> List[float]:
+        """
+        Okapi IDF per term, with negative values floored to epsilon * mean IDF.
+        
+        Args:
+            doc_freqs: Number of documents containing each term, by term id.
+            corpus_size: Number of documents.
+            
+        Returns:
+            IDF for each term id.
+        """
+        idf = [math.log(corpus_size - df + 0.5) - math.log(df + 0.5) for df in doc_freqs]
+        eps = self.config.epsilon * (sum(idf) / len(idf))
+        return [value if value >= 0 else eps for value in idf]
+    
+    def save(self, directory: str) -> None:
+        """
+        Persist the built index so it can be reloaded without re-tokenizing.
+        
+        Postings are written as flat NumPy arrays (CSR-style: offsets into
+        concatenated doc ids and weights); chunks, vocabulary and config are
+        pickled alongside.
+        
+        Args:
+            directory: Directory to write the index files into.
+        """
+        os.makedirs(directory, exist_ok=True)
+        
+        lengths = [len(docs) for docs, _ in self._postings]
+        offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        if self._postings:
+            docs = np.concatenate([docs for docs, _ in self._postings])
+            weights = np.concatenate([weights for _, weights in self._postings])
+        else:
+            docs = np.zeros(0, dtype=np.int64)
+            weights = np.zeros(0, dtype=np.float64)
+        
+        np.save(os.path.join(directory, _DOC_LENS_FILE), self._doc_lens)
+        np.save(os.path.join(directory, _OFFSETS_FILE), offsets)
+        np.save(os.path.join(directory, _DOCS_FILE), docs)
+        np.save(os.path.join(directory, _WEIGHTS_FILE), weights)
+        
+        # Vocabulary in term-id order
+        terms = sorted(self._vocab, key=self._vocab.__getitem__)
+        with open(os.path.join(directory, _META_FILE), "wb") as f:
+            pickle.dump(
+                {"config": asdict(self.config), "chunks": self._chunks, "terms": terms},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL
+            )
+    
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "BM25Index":
+        """
+        Load an index written by `save`.
+        
+        Args:
+            directory: Directory the index was saved to.
+            mmap: Memory-map the posting arrays instead of reading them into RAM.
+            
+        Returns:
+            BM25Index ready for search, with the config it was built with.
+        """
+        with open(os.path.join(directory, _META_FILE), "rb") as f:
+            meta = pickle.load(f)
+        
+        mmap_mode = "r" if mmap else None
+        offsets = np.load(os.path.join(directory, _OFFSETS_FILE))
+        docs = np.load(os.path.join(directory, _DOCS_FILE), mmap_mode=mmap_mode)
+        weights = np.load(os.path.join(directory, _WEIGHTS_FILE), mmap_mode=mmap_mode)
+        
+        index = cls(BM25Config(**meta["config"]))
+        index._chunks = meta["chunks"]
+        index._chunk_ids = [sys.intern(chunk["id"]) for chunk in index._chunks]
+        index._doc_lens = np.load(os.path.join(directory, _DOC_LENS_FILE))
+        index._vocab = {term: term_id for term_id, term in enumerate(meta["terms"])}
+        index._postings = [
+            (docs[start:end], weights[start:end])
+            for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())
+        ]
+        return index
     
     def search(self, query: str, top_k: int = 10) -> List[RetrievalResult]:
         """
@@ -80,31 +262,66 @@ class BM25Index:
         Returns:
             List of RetrievalResult sorted by relevance score.
         """
-        if self._index is None or not self._chunks:
+        if not self._postings or top_k <= 0:
             return []
         
-        tokenized_query = self._tokenize(query)
-        scores = self._index.get_scores(tokenized_query)
+        scores = np.zeros(len(self._chunks))
+        touched = []
+        for term in self._tokenize(query):
+            term_id = self._vocab.get(term)
+            if term_id is not None:
+                docs, weights = self._postings[term_id]
+                scores[docs] += weights
+                touched.append(docs)
+        
+        if not touched:
+            return []
         
-        # Get top-k indices
-        scored_indices = [(i, score) for i, score in enumerate(scores)]
-        scored_indices.sort(key=lambda x: x[1], reverse=True)
-        top_indices = scored_indices[:top_k]
+        # Only documents containing a query term can score; rank just those
+        candidates = touched[0] if len(touched) == 1 else np.unique(np.concatenate(touched))
+        top_indices = self._top_k_indices(scores, candidates, top_k)
         
         results = []
-        for idx, score in top_indices:
-            if score > 0:  # Only include positive scores
-                chunk = self._chunks[idx]
-                results.append(RetrievalResult(
-                    chunk_id=chunk["id"],
-                    text=chunk["text"],
-                    score=float(score),
-                    source="bm25",
-                    metadata=chunk.get("metadata", {}),
-                ))
+        for idx in top_indices:
+            chunk = self._chunks[idx]
+            results.append(RetrievalResult(
+                chunk_id=self._chunk_ids[idx],
+                text=chunk["text"],
+                score=float(scores[idx]),
+                source="bm25",
+                metadata=chunk.get("metadata", {}),
+            ))
         
         return results
     
+    @staticmethod
+    def _top_k_indices(scores: np.ndarray, candidates: np.ndarray, top_k: int) -> List[int]:
+        """
+        Indices of the top_k positive scores, best first; ties keep index order.
+        
+        Uses a partial partition (O(n)) plus a sort of only the k winners,
+        instead of sorting every document.
+        
+        Args:
+            scores: Score per document.
+            candidates: Sorted indices of the documents that may score.
+            top_k: Number of indices to return.
+            
+        Returns:
+            Document indices.
+        """
+        # Only include positive scores
+        candidates = candidates[scores[candidates] > 0]
+        if len(candidates) > top_k:
+            # k-th best score; keep everything above it plus the earliest ties
+            kth = np.partition(scores[candidates], len(candidates) - top_k)[len(candidates) - top_k]
+            above = candidates[scores[candidates] > kth]
+            ties = candidates[scores[candidates] == kth][:top_k - len(above)]
+            candidates = np.concatenate((above, ties))
+        
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order].tolist()
+    
     def _tokenize(self, text: str) -> List[str]:
         """
         Tokenize text for BM25 indexing.
@@ -120,32 +337,7 @@ class BM25Index:
         Returns:
             List of tokens.
         """
-        # Lowercase
-        text = text.lower()
-        
-        # Keep alphanumeric, hyphens, and underscores
-        # Split on whitespace and punctuation (except hyphens in words)
-        tokens = re.findall(r'\b[\w-]+\b', text)
-        
-        # Filter out very short tokens and pure numbers
-        tokens = [
-            t for t in tokens 
-            if len(t) > 1 and not t.isdigit()
-        ]
-        
-        # Remove common stopwords for academic text
-        stopwords = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to',
-            'for', 'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are',
-            'were', 'been', 'be', 'have', 'has', 'had', 'do', 'does', 'did',
-            'will', 'would', 'could', 'should', 'may', 'might', 'must',
-            'this', 'that', 'these', 'those', 'it', 'its', 'we', 'our',
-            'they', 'their', 'which', 'who', 'whom', 'what', 'where', 'when',
-        }
-        
-        tokens = [t for t in tokens if t not in stopwords]
-        
-        return tokens
+        return tokenize(text)
     
     def get_index_stats(self) -> Dict[str, Any]:
         """
@@ -161,7 +353,7 @@ class BM25Index:
                 "total_tokens": 0,
             }
         
-        total_tokens = sum(len(tokens) for tokens in self._tokenized_corpus)
+        total_tokens = int(self._doc_lens.sum())
         
         return {
             "num_documents": len(self._chunks),
@@ -183,5 +375,6 @@ class BM25Index:
         config = BM25Config(
             k1=config_dict.get("k1", 1.5),
             b=config_dict.get("b", 0.75),
+            epsilon=config_dict.get("epsilon", 0.25),
         )
         return BM25Index(config)
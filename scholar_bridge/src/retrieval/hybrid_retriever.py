@@ -5,14 +5,28 @@ Uses Reciprocal Rank Fusion (RRF) to merge results from keyword
 and semantic search for optimal retrieval quality.
 """
 
-from collections import defaultdict
+import asyncio
+import heapq
+import sys
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 
-from . import RetrievalResult, RetrievalConfig
+import numpy as np
+
+from . import RetrievalResult, RetrievalBatch, RetrievalConfig, RESULT_SOURCES
+from ._rrf_kernel import rank_weights, rrf_scores
 from .bm25_index import BM25Index
 
 
+# Recent retrieve() results kept per retriever (LRU)
+RETRIEVAL_CACHE_SIZE = 1024
+
+# Up to this many input results (both lists), RRF runs as one scalar pass;
+# below it NumPy/Numba call overhead outweighs the vectorized work
+SCALAR_FUSION_MAX = 128
+
+
 @dataclass
 class HybridConfig:
     """Configuration for hybrid retrieval."""
@@ -49,6 +63,12 @@ class HybridRetriever:
         self.bm25_index = bm25_index
         self.vector_store = vector_store
         self.config = config or HybridConfig()
+        self._cache: "OrderedDict[tuple, Tuple[RetrievalResult, ...]]" = OrderedDict()
+        
+        # Per-rank RRF weights for the configured list sizes, built once
+        self._weights_key: Optional[tuple] = None
+        self._bm25_weights = self._vector_weights = np.zeros(0)
+        self._rank_weights(self.config.rrf_k, self.config.top_k_bm25, self.config.top_k_vector)
     
     def retrieve(
         self,
@@ -58,6 +78,11 @@ class HybridRetriever:
         """
         Retrieve relevant chunks using hybrid search.
         
+        Repeated queries (up to whitespace) are answered from an LRU cache,
+        skipping tokenization, embedding and the ANN search. Entries are keyed
+        on the fusion config and the BM25 index build, so changing either
+        misses the cache; call `clear_cache` after changing the vector store.
+        
         Args:
             query: Search query string.
             top_k: Number of results to return (overrides config).
@@ -67,6 +92,147 @@ class HybridRetriever:
         """
         final_k = top_k or self.config.final_top_k
         
+        key = self._cache_key(query, final_k)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        merged = self._retrieve_uncached(query, final_k)
+        self._cache_put(key, merged)
+        
+        return merged
+    
+    async def retrieve_async(
+        self,
+        query: str,
+        top_k: Optional[int] = None
+    ) -> List[RetrievalResult]:
+        """
+        Async `retrieve`: BM25 and vector search run concurrently.
+        
+        Both searches run in worker threads, so latency is roughly the
+        slower of the two rather than their sum. `retrieve` stays sync for
+        existing callers; it cannot wrap this with asyncio.run because it
+        is called from inside running event loops.
+        
+        Args:
+            query: Search query string.
+            top_k: Number of results to return (overrides config).
+            
+        Returns:
+            List of RetrievalResult sorted by combined relevance.
+        """
+        final_k = top_k or self.config.final_top_k
+        
+        key = self._cache_key(query, final_k)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        bm25_results, vector_results = await asyncio.gather(
+            asyncio.to_thread(self.bm25_index.search, query, self.config.top_k_bm25),
+            asyncio.to_thread(self._vector_search, query, self.config.top_k_vector),
+        )
+        
+        merged = self.rrf_fusion(
+            bm25_results,
+            vector_results,
+            k=self.config.rrf_k,
+            top_k=final_k
+        )
+        self._cache_put(key, merged)
+        
+        return merged
+    
+    def retrieve_batch(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None
+    ) -> List[List[RetrievalResult]]:
+        """
+        Retrieve relevant chunks for several queries at once.
+        
+        Queries missing from the cache share one vector store query, so the
+        embedding and ANN search run as a single batch.
+        
+        Args:
+            queries: Search query strings.
+            top_k: Number of results to return per query (overrides config).
+            
+        Returns:
+            One list of RetrievalResult per query, in query order.
+        """
+        final_k = top_k or self.config.final_top_k
+        
+        keys = [self._cache_key(query, final_k) for query in queries]
+        batch: List[Optional[List[RetrievalResult]]] = [self._cache_get(key) for key in keys]
+        
+        # First position of each distinct uncached query
+        misses: Dict[tuple, int] = {}
+        for i, results in enumerate(batch):
+            if results is None:
+                misses.setdefault(keys[i], i)
+        
+        if misses:
+            vector_batch = self._vector_search_batch(
+                [queries[i] for i in misses.values()],
+                top_k=self.config.top_k_vector
+            )
+            fused: Dict[tuple, List[RetrievalResult]] = {}
+            for i, vector_results in zip(misses.values(), vector_batch):
+                bm25_results = self.bm25_index.search(
+                    queries[i],
+                    top_k=self.config.top_k_bm25
+                )
+                merged = self.rrf_fusion(
+                    bm25_results,
+                    vector_results,
+                    k=self.config.rrf_k,
+                    top_k=final_k
+                )
+                self._cache_put(keys[i], merged)
+                fused[keys[i]] = batch[i] = merged
+            
+            # Repeats of a query in this batch get their own copies
+            for i, results in enumerate(batch):
+                if results is None:
+                    batch[i] = [result.copy() for result in fused[keys[i]]]
+        
+        return batch
+    
+    def clear_cache(self) -> None:
+        """Drop cached retrieve() results, e.g. after updating the vector store."""
+        self._cache.clear()
+    
+    def _cache_key(self, query: str, final_k: int) -> tuple:
+        """Whitespace-normalized query plus everything that changes its results."""
+        config = self.config
+        return (
+            " ".join(query.split()),
+            final_k,
+            config.bm25_weight,
+            config.vector_weight,
+            config.top_k_bm25,
+            config.top_k_vector,
+            config.rrf_k,
+            self.bm25_index.token,
+        )
+    
+    def _cache_get(self, key: tuple) -> Optional[List[RetrievalResult]]:
+        cached = self._cache.get(key)
+        if cached is None:
+            return None
+        self._cache.move_to_end(key)
+        # Results are mutable; hand out copies
+        return [result.copy() for result in cached]
+    
+    def _cache_put(self, key: tuple, results: List[RetrievalResult]) -> None:
+        self._cache[key] = tuple(result.copy() for result in results)
+        while len(self._cache) > RETRIEVAL_CACHE_SIZE:
+            self._cache.popitem(last=False)
+    
+    def _retrieve_uncached(self, query: str, final_k: int) -> List[RetrievalResult]:
+        """BM25 + vector search fused with RRF; `retrieve` without the cache."""
         # Get BM25 results
         bm25_results = self.bm25_index.search(
             query, 
@@ -79,14 +245,13 @@ class HybridRetriever:
             top_k=self.config.top_k_vector
         )
         
-        # Merge using RRF
-        merged = self.rrf_fusion(
+        # Merge using RRF, keeping only the results we return
+        return self.rrf_fusion(
             bm25_results,
             vector_results,
-            k=self.config.rrf_k
+            k=self.config.rrf_k,
+            top_k=final_k
         )
-        
-        return merged[:final_k]
     
     def _vector_search(
         self,
@@ -103,49 +268,76 @@ class HybridRetriever:
         Returns:
             List of RetrievalResult from vector search.
         """
-        if self.vector_store is None:
-            return []
+        return self._vector_search_batch([query], top_k)[0]
+    
+    def _vector_search_batch(
+        self,
+        queries: List[str],
+        top_k: int
+    ) -> List[List[RetrievalResult]]:
+        """
+        Perform vector similarity search for several queries in one call.
+        
+        ChromaDB embeds and searches all query_texts together and returns
+        per-query lists.
+        
+        Args:
+            queries: Search query strings.
+            top_k: Number of results to return per query.
+            
+        Returns:
+            One list of RetrievalResult per query, in query order.
+        """
+        if self.vector_store is None or not queries:
+            return [[] for _ in queries]
         
         try:
             # ChromaDB query
             results = self.vector_store.query(
-                query_texts=[query],
+                query_texts=list(queries),
                 n_results=top_k,
                 include=["documents", "metadatas", "distances"]
             )
             
-            retrieval_results = []
+            batch_results = [[] for _ in queries]
             
             if results and results.get("ids"):
-                ids = results["ids"][0]
-                documents = results["documents"][0] if results.get("documents") else []
-                metadatas = results["metadatas"][0] if results.get("metadatas") else []
-                distances = results["distances"][0] if results.get("distances") else []
+                all_documents = results.get("documents") or []
+                all_metadatas = results.get("metadatas") or []
+                all_distances = results.get("distances") or []
                 
-                for i, chunk_id in enumerate(ids):
-                    # Convert distance to similarity score (ChromaDB uses L2 distance)
-                    distance = distances[i] if i < len(distances) else 0
-                    score = 1 / (1 + distance)  # Convert distance to similarity
+                for q_idx, ids in enumerate(results["ids"][:len(queries)]):
+                    documents = all_documents[q_idx] if q_idx < len(all_documents) else []
+                    metadatas = all_metadatas[q_idx] if q_idx < len(all_metadatas) else []
+                    distances = all_distances[q_idx] if q_idx < len(all_distances) else []
+                    retrieval_results = batch_results[q_idx]
                     
-                    retrieval_results.append(RetrievalResult(
-                        chunk_id=chunk_id,
-                        text=documents[i] if i < len(documents) else "",
-                        score=score,
-                        source="vector",
-                        metadata=metadatas[i] if i < len(metadatas) else {},
-                    ))
+                    for i, chunk_id in enumerate(ids):
+                        # Convert distance to similarity score (ChromaDB uses L2 distance)
+                        distance = distances[i] if i < len(distances) else 0
+                        score = 1 / (1 + distance)  # Convert distance to similarity
+                        
+                        retrieval_results.append(RetrievalResult(
+                            # Same string object as the BM25 index's id
+                            chunk_id=sys.intern(chunk_id),
+                            text=documents[i] if i < len(documents) else "",
+                            score=score,
+                            source="vector",
+                            metadata=metadatas[i] if i < len(metadatas) else {},
+                        ))
             
-            return retrieval_results
+            return batch_results
             
         except Exception as e:
             print(f"Vector search error: {e}")
-            return []
+            return [[] for _ in queries]
     
     def rrf_fusion(
         self,
         bm25_results: List[RetrievalResult],
         vector_results: List[RetrievalResult],
-        k: int = 60
+        k: int = 60,
+        top_k: Optional[int] = None
     ) -> List[RetrievalResult]:
         """
         Merge results using Reciprocal Rank Fusion.
@@ -156,41 +348,203 @@ class HybridRetriever:
             bm25_results: Results from BM25 search.
             vector_results: Results from vector search.
             k: RRF constant (default 60).
+            top_k: Only return the best top_k results (default: all).
             
         Returns:
             Merged and re-ranked results.
         """
-        scores: Dict[str, float] = defaultdict(float)
-        chunks: Dict[str, RetrievalResult] = {}
+        if len(bm25_results) + len(vector_results) <= SCALAR_FUSION_MAX:
+            return self._rrf_fusion_scalar(bm25_results, vector_results, k, top_k)
+        
+        # Code each distinct chunk id by first appearance (BM25 first) in one
+        # pass over both lists; the first result seen for an id is the one
+        # returned. Lookups are bound to locals for the loop.
+        codes: Dict[str, int] = {}
+        chunks: List[RetrievalResult] = []
+        codes_get = codes.get
+        add_chunk = chunks.append
+        all_codes = []
+        add_code = all_codes.append
+        for results in (bm25_results, vector_results):
+            for result in results:
+                chunk_id = result.chunk_id
+                code = codes_get(chunk_id)
+                if code is None:
+                    code = codes[chunk_id] = len(chunks)
+                    add_chunk(result)
+                add_code(code)
         
-        # Score BM25 results
-        for rank, result in enumerate(bm25_results):
-            chunk_id = result["chunk_id"]
-            scores[chunk_id] += self.config.bm25_weight / (k + rank + 1)
-            if chunk_id not in chunks:
-                chunks[chunk_id] = result
+        all_codes = np.array(all_codes, dtype=np.int64)
+        n_bm25 = len(bm25_results)
         
-        # Score vector results
-        for rank, result in enumerate(vector_results):
-            chunk_id = result["chunk_id"]
-            scores[chunk_id] += self.config.vector_weight / (k + rank + 1)
-            if chunk_id not in chunks:
-                chunks[chunk_id] = result
+        # Numeric accumulation of the weighted reciprocal ranks
+        scores = rrf_scores(
+            all_codes[:n_bm25],
+            all_codes[n_bm25:],
+            len(chunks),
+            *self._rank_weights(k, n_bm25, len(vector_results))
+        )
         
-        # Sort by combined score
-        sorted_ids = sorted(scores.keys(), key=lambda x: scores[x], reverse=True)
+        # Sort by combined score; ties keep first-appearance order
+        order = self._top_k_order(scores, top_k)
         
         # Build final results with updated scores
         results = []
-        for chunk_id in sorted_ids:
-            result = chunks[chunk_id].copy()
-            result["score"] = scores[chunk_id]
-            result["source"] = "hybrid"
-            results.append(result)
+        for code in order.tolist():
+            chunk = chunks[code]
+            results.append(RetrievalResult(
+                chunk_id=chunk.chunk_id,
+                text=chunk.text,
+                score=float(scores[code]),
+                source="hybrid",
+                metadata=chunk.metadata,
+            ))
+        
+        return results
+    
+    def _rrf_fusion_scalar(
+        self,
+        bm25_results: List[RetrievalResult],
+        vector_results: List[RetrievalResult],
+        k: int,
+        top_k: Optional[int]
+    ) -> List[RetrievalResult]:
+        """
+        `rrf_fusion` for short lists, in a single pass over both.
+        
+        Sums the same cached per-rank weights in the same order as the
+        kernel, so scores are identical. The dict keeps first-appearance
+        order and both selections are stable, so ties break the same way.
+        """
+        bm25_weights, vector_weights = self._rank_weights(k, len(bm25_results), len(vector_results))
+        
+        scores: Dict[str, float] = {}
+        chunks: Dict[str, RetrievalResult] = {}
+        for results, weights in (
+            (bm25_results, bm25_weights[:len(bm25_results)].tolist()),
+            (vector_results, vector_weights[:len(vector_results)].tolist()),
+        ):
+            for result, weight in zip(results, weights):
+                chunk_id = result.chunk_id
+                if chunk_id in scores:
+                    scores[chunk_id] += weight
+                else:
+                    scores[chunk_id] = weight
+                    chunks[chunk_id] = result
+        
+        if top_k is None:
+            ranked = sorted(scores, key=scores.__getitem__, reverse=True)
+        else:
+            ranked = heapq.nlargest(top_k, scores, key=scores.__getitem__)
+        
+        results = []
+        for chunk_id in ranked:
+            chunk = chunks[chunk_id]
+            results.append(RetrievalResult(
+                chunk_id=chunk_id,
+                text=chunk.text,
+                score=scores[chunk_id],
+                source="hybrid",
+                metadata=chunk.metadata,
+            ))
         
         return results
 
     
+    def rrf_fusion_batch(
+        self,
+        bm25_batch: RetrievalBatch,
+        vector_batch: RetrievalBatch,
+        k: int = 60,
+        top_k: Optional[int] = None
+    ) -> RetrievalBatch:
+        """
+        Reciprocal Rank Fusion over column batches.
+        
+        Same scores and order as `rrf_fusion`, with ids coded by np.unique
+        rather than a dict walk.
+        
+        Args:
+            bm25_batch: Results from BM25 search.
+            vector_batch: Results from vector search.
+            k: RRF constant (default 60).
+            top_k: Only return the best top_k results (default: all).
+            
+        Returns:
+            Merged and re-ranked batch, all sourced "hybrid".
+        """
+        all_ids = np.concatenate((bm25_batch.ids, vector_batch.ids))
+        n_bm25 = len(bm25_batch)
+        
+        # np.unique codes ids in sorted order; recode by first appearance
+        # (BM25 first) so ties break as in rrf_fusion
+        _, first_pos, inverse = np.unique(all_ids, return_index=True, return_inverse=True)
+        by_appearance = np.argsort(first_pos, kind="stable")
+        recode = np.empty_like(by_appearance)
+        recode[by_appearance] = np.arange(len(by_appearance))
+        all_codes = recode[inverse].astype(np.int64)
+        first_pos = first_pos[by_appearance]
+        
+        scores = rrf_scores(
+            all_codes[:n_bm25],
+            all_codes[n_bm25:],
+            len(first_pos),
+            *self._rank_weights(k, n_bm25, len(vector_batch))
+        )
+        
+        order = self._top_k_order(scores, top_k)
+        
+        # The first result seen for an id supplies its text and metadata
+        picked = first_pos[order].tolist()
+        all_texts = bm25_batch.texts + vector_batch.texts
+        all_metadata = bm25_batch.metadata + vector_batch.metadata
+        return RetrievalBatch(
+            ids=all_ids[first_pos[order]],
+            texts=[all_texts[i] for i in picked],
+            scores=scores[order],
+            sources=np.full(len(order), RESULT_SOURCES.index("hybrid"), dtype=np.uint8),
+            metadata=[all_metadata[i] for i in picked],
+        )
+    
+    def _rank_weights(self, k: int, n_bm25: int, n_vector: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Per-rank RRF weights (weight / (k + rank)) for both lists.
+        
+        Cached for the current weights and k, and only rebuilt when those
+        change or a list is longer than any seen so far.
+        """
+        key = (float(self.config.bm25_weight), float(self.config.vector_weight), k)
+        if (
+            key != self._weights_key
+            or n_bm25 > len(self._bm25_weights)
+            or n_vector > len(self._vector_weights)
+        ):
+            bm25_weight, vector_weight, _ = key
+            self._bm25_weights = rank_weights(bm25_weight, k, max(n_bm25, self.config.top_k_bm25))
+            self._vector_weights = rank_weights(vector_weight, k, max(n_vector, self.config.top_k_vector))
+            self._weights_key = key
+        return self._bm25_weights, self._vector_weights
+    
+    @staticmethod
+    def _top_k_order(scores: np.ndarray, top_k: Optional[int]) -> np.ndarray:
+        """
+        Indices of the top_k scores, best first; ties keep index order.
+        
+        Partitions out the top_k (O(n)) and sorts only those, rather than
+        sorting every fused id.
+        """
+        candidates = np.arange(len(scores))
+        if top_k is not None and len(scores) > top_k:
+            if top_k <= 0:
+                return candidates[:0]
+            # k-th best score; keep everything above it plus the earliest ties
+            kth = np.partition(scores, len(scores) - top_k)[len(scores) - top_k]
+            above = candidates[scores > kth]
+            ties = candidates[scores == kth][:top_k - len(above)]
+            candidates = np.concatenate((above, ties))
+        
+        return candidates[np.lexsort((candidates, -scores[candidates]))]
+    
     def get_retrieval_stats(
         self,
         bm25_results: List[RetrievalResult],
@@ -208,19 +562,20 @@ class HybridRetriever:
         Returns:
             Dictionary with retrieval statistics.
         """
-        bm25_ids = {r["chunk_id"] for r in bm25_results}
-        vector_ids = {r["chunk_id"] for r in vector_results}
-        merged_ids = {r["chunk_id"] for r in merged_results}
+        # Ids are interned at index/search time, so these sets hash and compare cheaply
+        bm25_ids = {r.chunk_id for r in bm25_results}
+        vector_ids = {r.chunk_id for r in vector_results}
+        overlap_count = len(bm25_ids & vector_ids)
         
         return {
             "bm25_count": len(bm25_results),
             "vector_count": len(vector_results),
             "merged_count": len(merged_results),
-            "overlap_count": len(bm25_ids & vector_ids),
-            "bm25_only": len(bm25_ids - vector_ids),
-            "vector_only": len(vector_ids - bm25_ids),
-            "avg_bm25_score": sum(r["score"] for r in bm25_results) / len(bm25_results) if bm25_results else 0,
-            "avg_vector_score": sum(r["score"] for r in vector_results) / len(vector_results) if vector_results else 0,
+            "overlap_count": overlap_count,
+            "bm25_only": len(bm25_ids) - overlap_count,
+            "vector_only": len(vector_ids) - overlap_count,
+            "avg_bm25_score": sum(r.score for r in bm25_results) / len(bm25_results) if bm25_results else 0,
+            "avg_vector_score": sum(r.score for r in vector_results) / len(vector_results) if vector_results else 0,
         }
     
     @staticmethod
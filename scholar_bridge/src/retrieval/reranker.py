@@ -5,9 +5,31 @@ Provides LLM-based reranking and diversity filtering for retrieved chunks.
 """
 
 from dataclasses import dataclass
-from typing import List, Optional, Any, Dict
+from typing import List, Optional, Any, Dict, Tuple
+import asyncio
+import hashlib
+
+import numpy as np
 
 from . import RetrievalResult, RerankConfig
+from ._diversity_kernel import select_diverse
+from ..utils.json_parser import extract_json
+
+# Candidates scored per batched LLM prompt
+RERANK_BATCH_SIZE = 20
+
+# From this many results, diversity filtering uses the compiled kernel; below
+# it the set loop finishes before Numba's ~0.7 s per-process compile pays off
+DIVERSITY_KERNEL_MIN = 500
+
+
+# MinHash: h_i(x) = (a_i * x + b_i) mod p over 32-bit word hashes. With p < 2**31
+# every product fits in uint64, so a whole signature is one broadcast + min.
+MINHASH_PERMUTATIONS = 64
+_MINHASH_PRIME = np.uint64(2**31 - 1)
+_minhash_rng = np.random.default_rng(0)
+_MINHASH_A = _minhash_rng.integers(1, 2**31 - 1, size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, 2**31 - 1, size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
 
 
 class Reranker:
@@ -59,7 +81,7 @@ class Reranker:
         # Filter by relevance threshold
         filtered = [
             r for r in scored_results 
-            if r["score"] >= self.config.relevance_threshold
+            if r.score >= self.config.relevance_threshold
         ]
         
         # Apply diversity filtering
@@ -88,21 +110,85 @@ class Reranker:
         if not self.llm_client:
             return results
         
-        scored = []
+        # LLM calls are independent; run them concurrently, bounded so a
+        # large candidate set doesn't trip rate limits
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        
+        # One prompt scores a whole batch of candidates
+        async def score_batch(start: int) -> List[Optional[float]]:
+            async with semaphore:
+                return await self._get_batch_relevance_scores(
+                    [r.text for r in results[start:start + RERANK_BATCH_SIZE]], query
+                )
+        
+        batches = await asyncio.gather(
+            *(score_batch(start) for start in range(0, len(results), RERANK_BATCH_SIZE))
+        )
+        scores: List[Any] = [score for batch in batches for score in batch]
+        
+        # Fall back to one call per candidate the batch reply didn't cover
+        async def score_one(result: RetrievalResult) -> float:
+            async with semaphore:
+                return await self._get_relevance_score(result.text, query)
         
-        for result in results:
-            try:
-                score = await self._get_relevance_score(result["text"], query)
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            retried = await asyncio.gather(*(score_one(results[i]) for i in missing), return_exceptions=True)
+            for i, score in zip(missing, retried):
+                scores[i] = score
+        
+        scored = []
+        for result, score in zip(results, scores):
+            if isinstance(score, Exception):
+                scored.append(result)
+            else:
                 new_result = result.copy()
-                new_result["score"] = score
+                new_result.score = score
                 scored.append(new_result)
-            except Exception:
-                scored.append(result)
         
         # Sort by new scores
-        scored.sort(key=lambda x: x["score"], reverse=True)
+        scored.sort(key=lambda x: x.score, reverse=True)
         return scored
     
+    async def _get_batch_relevance_scores(
+        self,
+        texts: List[str],
+        query: str
+    ) -> List[Optional[float]]:
+        """
+        Get relevance scores for several chunks from a single LLM call.
+        
+        Args:
+            texts: Chunk texts.
+            query: Search query.
+            
+        Returns:
+            Relevance score between 0 and 1 per text, or None where the
+            response did not contain a usable score.
+        """
+        passages = "\n\n".join(f"[{i}] {text[:500]}..." for i, text in enumerate(texts))
+        prompt = f"""Rate the relevance of each numbered text to the query on a scale of 0-10.
+
+Query: {query}
+
+Texts:
+{passages}
+
+Respond with only JSON in this form, one entry per text:
+{{"scores": [{{"index": 0, "score": 7}}]}}"""
+
+        scores: List[Optional[float]] = [None] * len(texts)
+        try:
+            response = await self.llm_client.generate(prompt)
+            entries = extract_json(response).get("scores", [])
+            for entry in entries:
+                index = int(entry["index"])
+                if 0 <= index < len(texts):
+                    scores[index] = min(max(float(entry["score"]) / 10.0, 0.0), 1.0)
+        except Exception:
+            pass
+        return scores
+    
     async def _get_relevance_score(self, text: str, query: str) -> float:
         """
         Get relevance score for a single chunk.
@@ -145,22 +231,116 @@ Respond with only a number between 0 and 10."""
         if not results:
             return []
         
+        if self.config.diversity_minhash:
+            return self._filter_diversity_minhash(results)
+        
+        threshold = self.config.diversity_threshold
+        
+        if select_diverse is not None and len(results) >= DIVERSITY_KERNEL_MIN:
+            # Compiled pass over sorted word-id arrays
+            flat, offsets = self._sorted_word_ids([r.text for r in results])
+            return [results[i] for i in select_diverse(flat, offsets, float(threshold)).tolist()]
+        
+        # Word sets are built once per result rather than once per comparison
         diverse = [results[0]]
+        selected_words = [self._word_set(results[0].text)]
         
         for result in results[1:]:
+            words = self._word_set(result.text)
+            
             # Check similarity with already selected results
             is_diverse = True
-            for selected in diverse:
-                similarity = self._text_similarity(result["text"], selected["text"])
-                if similarity > self.config.diversity_threshold:
+            n_words = len(words)
+            for selected in selected_words:
+                # Jaccard <= min(|A|, |B|) / max(|A|, |B|); when that bound
+                # already passes, skip the intersection
+                longer = max(n_words, len(selected))
+                if longer and min(n_words, len(selected)) / longer <= threshold:
+                    continue
+                if self._jaccard(words, selected) > threshold:
                     is_diverse = False
                     break
             
             if is_diverse:
                 diverse.append(result)
+                selected_words.append(words)
         
         return diverse
     
+    def _filter_diversity_minhash(
+        self,
+        results: List[RetrievalResult]
+    ) -> List[RetrievalResult]:
+        """
+        `_filter_diversity` on MinHash signatures instead of exact word sets.
+        
+        Estimated Jaccard against every selected result is one vectorized
+        comparison of signature rows, rather than a Python set intersection
+        per pair. With MINHASH_PERMUTATIONS = 64 the estimate's standard error
+        is at most ~0.06, so pairs near the threshold can be decided either way.
+        
+        Args:
+            results: Results to filter.
+            
+        Returns:
+            Diverse subset of results.
+        """
+        signatures, nonempty = self._minhash_signatures([r.text for r in results])
+        threshold = self.config.diversity_threshold
+        
+        selected = [0]
+        for i in range(1, len(results)):
+            if nonempty[i]:
+                rows = np.array(selected)
+                similarity = (signatures[rows] == signatures[i]).mean(axis=1)
+                # Empty texts have similarity 0 with everything, as in _jaccard
+                if np.any((similarity > threshold) & nonempty[rows]):
+                    continue
+            selected.append(i)
+        
+        return [results[i] for i in selected]
+    
+    def _minhash_signatures(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        MinHash signature per text, over the same word sets as `_word_set`.
+        
+        Returns:
+            (signatures, nonempty): a (len(texts), MINHASH_PERMUTATIONS) uint64
+            matrix, and whether each text had any words.
+        """
+        signatures = np.full((len(texts), MINHASH_PERMUTATIONS), _MINHASH_PRIME, dtype=np.uint64)
+        nonempty = np.zeros(len(texts), dtype=bool)
+        
+        for row, text in enumerate(texts):
+            words = self._word_set(text)
+            if not words:
+                continue
+            hashes = np.fromiter(
+                (int.from_bytes(hashlib.blake2b(w.encode(), digest_size=4).digest(), "little") for w in words),
+                dtype=np.uint64,
+                count=len(words)
+            )
+            signatures[row] = ((_MINHASH_A * hashes + _MINHASH_B) % _MINHASH_PRIME).min(axis=1)
+            nonempty[row] = True
+        
+        return signatures, nonempty
+    
+    def _sorted_word_ids(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        `_word_set` of each text as sorted int64 word hashes, packed end to end.
+        
+        Returns:
+            (flat, offsets): text i's ids are flat[offsets[i]:offsets[i + 1]].
+        """
+        word_ids = [
+            np.sort(np.fromiter(map(hash, words), dtype=np.int64, count=len(words)))
+            for words in map(self._word_set, texts)
+        ]
+        offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+        np.cumsum([len(ids) for ids in word_ids], out=offsets[1:])
+        flat = np.concatenate(word_ids) if word_ids else np.zeros(0, dtype=np.int64)
+        return flat, offsets
+    
     def _text_similarity(self, text1: str, text2: str) -> float:
         """
         Calculate simple text similarity using word overlap.
@@ -172,16 +352,21 @@ Respond with only a number between 0 and 10."""
         Returns:
             Similarity score between 0 and 1.
         """
-        words1 = set(text1.lower().split())
-        words2 = set(text2.lower().split())
-        
+        return self._jaccard(self._word_set(text1), self._word_set(text2))
+    
+    @staticmethod
+    def _word_set(text: str) -> frozenset:
+        return frozenset(text.lower().split())
+    
+    @staticmethod
+    def _jaccard(words1: frozenset, words2: frozenset) -> float:
+        """Jaccard similarity of two word sets; 0 if either is empty."""
         if not words1 or not words2:
             return 0.0
         
+        # |A ∪ B| = |A| + |B| - |A ∩ B|, without building the union set
         intersection = len(words1 & words2)
-        union = len(words1 | words2)
-        
-        return intersection / union if union > 0 else 0.0
+        return intersection / (len(words1) + len(words2) - intersection)
     
     def _limit_context(
         self,
@@ -196,20 +381,18 @@ Respond with only a number between 0 and 10."""
         Returns:
             Results fitting within token limit.
         """
-        limited = []
-        total_tokens = 0
+        # Rough token estimate (4 chars per token)
+        chunk_tokens = np.fromiter(
+            (len(result.text) // 4 for result in results),
+            dtype=np.int64,
+            count=len(results)
+        )
         
-        for result in results:
-            # Rough token estimate (4 chars per token)
-            chunk_tokens = len(result["text"]) // 4
-            
-            if total_tokens + chunk_tokens <= self.config.max_context_tokens:
-                limited.append(result)
-                total_tokens += chunk_tokens
-            else:
-                break
+        # Counts are non-negative, so the running total is sorted and the
+        # first chunk that overflows the budget is a binary search away
+        cutoff = np.searchsorted(np.cumsum(chunk_tokens), self.config.max_context_tokens, side="right")
         
-        return limited
+        return results[:int(cutoff)]
     
     @staticmethod
     def from_config_dict(
@@ -229,7 +412,9 @@ Respond with only a number between 0 and 10."""
         config = RerankConfig(
             enabled=config_dict.get("enabled", True),
             diversity_threshold=config_dict.get("diversity_threshold", 0.7),
+            diversity_minhash=config_dict.get("diversity_minhash", False),
             relevance_threshold=config_dict.get("relevance_threshold", 0.5),
             max_context_tokens=config_dict.get("max_context_tokens", 4000),
+            max_concurrency=config_dict.get("max_concurrency", 8),
         )
         return Reranker(llm_client, config)
@@ -0,0 +1,15 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Shared session so repeat requests (e.g. to arxiv.org) reuse warm TCP/TLS
+# connections and transient failures are retried with backoff.
+SESSION = requests.Session()
+
+_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=16,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(500, 502, 503, 504))
+)
+SESSION.mount("https://", _adapter)
+SESSION.mount("http://", _adapter)
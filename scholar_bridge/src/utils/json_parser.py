@@ -1,32 +1,105 @@
-import json
 import re
 
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so either backend
+# raises something this catches
+JSONDecodeError = _json.JSONDecodeError
+
+# Markdown code fences, with or without a json language tag
+_FENCE_RE = re.compile(r"```(?:json)?")
+# This matches the first outer opening brace and the last closing brace
+_JSON_OBJ_RE = re.compile(r"\{.*\}", re.DOTALL)
+# Characters that matter when matching braces inside JSON text
+_BRACE_SCAN_RE = re.compile(r'[{}"\\]')
+# Whitespace JSON parsers skip, and the characters a JSON document can start
+# with (N and I for the NaN/Infinity literals stdlib json accepts)
+_JSON_WHITESPACE = " \t\n\r"
+_JSON_START_CHARS = frozenset('{["-0123456789tfnNI')
+
+def _may_be_json(text: str) -> bool:
+    """False when a parse is bound to fail, so extract_json can skip it."""
+    stripped = text.lstrip(_JSON_WHITESPACE)
+    return bool(stripped) and stripped[0] in _JSON_START_CHARS
+
+def _find_first_object(text: str):
+    """
+    Returns the first balanced {...} span in text, or None.
+
+    Braces inside JSON strings (including escaped quotes) are ignored. The
+    scan jumps between significant characters, so it is a single linear pass.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    depth = 0
+    in_string = False
+    skip_to = start
+    for match in _BRACE_SCAN_RE.finditer(text, start):
+        pos = match.start()
+        if pos < skip_to:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                skip_to = pos + 2
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:pos + 1]
+    return None
+
 def extract_json(text: str) -> dict:
     """
     Robustly extracts JSON from a string, handling markdown blocks and surrounding text.
     """
+    # Parses that cannot succeed are skipped rather than tried for the
+    # exception: fenced or prose-wrapped responses go straight to the step
+    # that can read them
+
     # 1. Try straightforward parse
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
+    if _may_be_json(text):
+        try:
+            return _json.loads(text)
+        except JSONDecodeError:
+            pass
 
     # 2. Try removing markdown fences
-    clean_text = text.replace("```json", "").replace("```", "").strip()
-    try:
-        return json.loads(clean_text)
-    except json.JSONDecodeError:
-        pass
+    has_fence = "```" in text
+    clean_text = (_FENCE_RE.sub("", text) if has_fence else text).strip()
+    # Without fences, only str.strip's extra whitespace can change the outcome
+    if (has_fence or clean_text != text.strip(_JSON_WHITESPACE)) and _may_be_json(clean_text):
+        try:
+            return _json.loads(clean_text)
+        except JSONDecodeError:
+            pass
+
+    # 3. First balanced object {...}, e.g. when the response holds several
+    obj_text = _find_first_object(text)
+    if obj_text is not None:
+        try:
+            return _json.loads(obj_text)
+        except JSONDecodeError:
+            pass
 
-    # 3. Regex search for object {...}
-    # This matches the first outer opening brace and the last closing brace
+    # 4. Regex search for object {...}
     try:
-        match = re.search(r"(\{.*\})", text, re.DOTALL)
+        match = _JSON_OBJ_RE.search(text)
         if match:
-            return json.loads(match.group(1))
-    except (json.JSONDecodeError, AttributeError):
+            return _json.loads(match.group(0))
+    except (JSONDecodeError, AttributeError):
         pass
 
-    # 4. Fail
+    # 5. Fail
     print(f"Failed to extract JSON from: {text[:100]}...")
     return {}
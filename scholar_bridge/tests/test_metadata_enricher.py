@@ -0,0 +1,21 @@
+import unittest
+
+from src.chunking.metadata_enricher import MetadataEnricher
+
+
+class DetectSectionTest(unittest.TestCase):
+    def setUp(self):
+        self.enricher = MetadataEnricher()
+
+    def test_keyword_match_is_case_insensitive(self):
+        self.assertEqual(self.enricher._detect_section("Our DATASET has 10k papers"), "methods")
+
+    def test_non_ascii_case_variants_do_not_raise(self):
+        # re.IGNORECASE folds 'ſ' (long s) to 's'; str.lower() does not
+        self.assertIsNone(self.enricher._detect_section("We describe the dataſet used"))
+        # The Kelvin sign lowercases to 'k', as in a plain text.lower() search
+        self.assertEqual(self.enricher._detect_section("K DATASET"), "methods")
+
+
+if __name__ == "__main__":
+    unittest.main()